@@ -0,0 +1,54 @@
+from __future__ import annotations
+import asyncio
+from contextlib import asynccontextmanager
+
+
+class Overloaded(Exception):
+    """No slot freed up within the queue timeout."""
+
+
+class ConcurrencyLimiter:
+    """Caps in-flight requests and sheds load instead of queuing without bound.
+
+    Up to max_inflight requests run at once and up to max_waiting wait for a
+    slot, each for at most queue_timeout seconds. Anything beyond that fails
+    fast with Overloaded.
+    """
+
+    def __init__(self, max_inflight: int, max_waiting: int, queue_timeout: float):
+        self.max_inflight = max_inflight
+        self.max_waiting = max_waiting
+        self.queue_timeout = queue_timeout
+        self._sem: asyncio.Semaphore | None = None
+        self.inflight = 0
+        self.waiting = 0
+        self.rejected = 0
+
+    @asynccontextmanager
+    async def slot(self):
+        if self._sem is None:
+            # created lazily so it belongs to the serving loop
+            self._sem = asyncio.Semaphore(self.max_inflight)
+        # decided from our own counters before any await, so a burst from idle
+        # cannot all slip past the check before the semaphore is taken
+        if self.inflight + self.waiting >= self.max_inflight + self.max_waiting:
+            self.rejected += 1
+            raise Overloaded("too many requests waiting")
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._sem.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise Overloaded(f"no slot within {self.queue_timeout}s")
+        finally:
+            self.waiting -= 1
+        self.inflight += 1
+        try:
+            yield
+        finally:
+            self.inflight -= 1
+            self._sem.release()
+
+    def stats(self) -> dict:
+        return {"inflight": self.inflight, "waiting": self.waiting, "rejected": self.rejected,
+                "max_inflight": self.max_inflight, "max_waiting": self.max_waiting}
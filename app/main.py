@@ -1,10 +1,33 @@
-from fastapi import FastAPI
-from pydantic import BaseModel
-from .graph import build_graph
+import asyncio, os
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Response
+from pydantic import BaseModel, Field
+from typing import List
+from .graph import build_graph, get_ctx, run_batch, node_classify, arun_direct, FAST_INTENTS
+from tools_mcp.questions import MAX_BATCH_QUESTIONS
+from .limiter import ConcurrencyLimiter, Overloaded
+from tools_mcp.tools import upsert_feeds, delete_feeds, adecoder_compatibility, aencoder_match
+from tools_mcp.schemas import (
+    UpsertFeedsRequest, UpsertFeedsResponse, DeleteFeedsRequest, DeleteFeedsResponse,
+    DecoderCompatibilityRequest, DecoderCompatibilityResponse, EncoderMatchRequest, EncoderMatchResponse,
+)
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # load the store off the event loop before the first request needs it
+    await asyncio.to_thread(get_ctx)
+    yield
+
+app = FastAPI(lifespan=lifespan)
 graph = build_graph()
 
+# /query admission control, overload gets a 503 instead of an unbounded queue
+limiter = ConcurrencyLimiter(
+    max_inflight=int(os.environ.get("CANYON_MAX_INFLIGHT", "64")),
+    max_waiting=int(os.environ.get("CANYON_MAX_WAITING", "256")),
+    queue_timeout=float(os.environ.get("CANYON_QUEUE_TIMEOUT_S", "2.0")),
+)
+
 class QueryRequest(BaseModel):
     question: str
 
@@ -14,13 +37,77 @@ class QueryResponse(BaseModel):
 
 @app.get("/health")
 def health():
-    return {"status": "ok"}
+    return {"status": "ok", "load": limiter.stats(), "cache": get_ctx().cache.stats()}
 
 @app.post("/query", response_model=QueryResponse)
-def query(req: QueryRequest):
+async def query(req: QueryRequest):
     state = {"question": req.question}
-    final = graph.invoke(state)
+    try:
+        async with limiter.slot():
+            # simple intents skip the graph machinery, same answer either way
+            classified = node_classify(state)
+            if classified["intent"] in FAST_INTENTS:
+                final = await arun_direct(classified)
+            else:
+                final = await graph.ainvoke(classified)
+    except Overloaded as e:
+        raise HTTPException(status_code=503, detail=f"server busy: {e}", headers={"Retry-After": "1"})
     return {
         "answer": final.get("answer", ""),
         "evidence": final.get("evidence", None),
     }
+
+class QueryBatchRequest(BaseModel):
+    # the whole batch holds one limiter slot, so its size is capped
+    questions: List[str] = Field(max_length=MAX_BATCH_QUESTIONS)
+
+class QueryBatchResponse(BaseModel):
+    results: List[QueryResponse]
+
+@app.post("/query/batch", response_model=QueryBatchResponse)
+async def query_batch(req: QueryBatchRequest):
+    ctx = get_ctx()
+    try:
+        async with limiter.slot():
+            finals = await ctx.run(run_batch, req.questions, ctx)
+    except Overloaded as e:
+        raise HTTPException(status_code=503, detail=f"server busy: {e}", headers={"Retry-After": "1"})
+    return {"results": [{"answer": f.get("answer", ""), "evidence": f.get("evidence")} for f in finals]}
+
+@app.post("/feeds/upsert", response_model=UpsertFeedsResponse)
+def feeds_upsert(req: UpsertFeedsRequest):
+    try:
+        return upsert_feeds(get_ctx(), req)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/feeds/delete", response_model=DeleteFeedsResponse)
+def feeds_delete(req: DeleteFeedsRequest):
+    return delete_feeds(get_ctx(), req)
+
+@app.post("/decoders/compatibility", response_model=DecoderCompatibilityResponse)
+async def decoders_compatibility(req: DecoderCompatibilityRequest):
+    try:
+        return await adecoder_compatibility(get_ctx(), req)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/encoder/match", response_model=EncoderMatchResponse)
+async def encoder_match(req: EncoderMatchRequest):
+    return await aencoder_match(get_ctx(), req)
+
+def _static_json(name: str) -> Response:
+    # pre-serialized once per data version, no model dump per request
+    return Response(content=get_ctx().static().json[name], media_type="application/json")
+
+@app.get("/params/encoder")
+def params_encoder():
+    return _static_json("encoder_params")
+
+@app.get("/params/decoder")
+def params_decoder():
+    return _static_json("decoder_params")
+
+@app.get("/schema")
+def table_schema():
+    return _static_json("table_schema")
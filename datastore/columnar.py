@@ -0,0 +1,437 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+# Table_defs_v2.csv "type" -> builder kind
+#   dict:  small int codes into a category array (enums)
+#   text:  stored as a "bytes" column (fixed-width ASCII) when unique-ish
+#          like FEED_ID, as a "dict" column otherwise, see _TextBuilder
+#   int / float: fixed-width numbers, bool: bit-packed
+DEF_KINDS = {"enum": "dict", "text": "text", "integer": "int", "float": "float", "boolean": "bool"}
+
+_TRUE = {"true", "1", "yes", "t", "y"}
+_FALSE = {"false", "0", "no", "f", "n"}
+
+
+def _int_dtype(lo: int, hi: int):
+    for dt in (np.int8, np.int16, np.int32):
+        info = np.iinfo(dt)
+        if info.min <= lo and hi <= info.max:
+            return dt
+    return np.int64
+
+
+def get_bits(bits: np.ndarray, pos: np.ndarray) -> np.ndarray:
+    """Read bits at positions from an np.packbits array without unpacking it all."""
+    pos = np.asarray(pos, dtype=np.intp)
+    return ((bits[pos >> 3] >> (7 - (pos & 7))) & 1).astype(bool)
+
+
+def _unpack(bits: Optional[np.ndarray], n: int) -> np.ndarray:
+    # None means every bit is set (validity bits with nothing missing)
+    if bits is None:
+        return np.ones(n, dtype=bool)
+    return np.unpackbits(bits, count=n).astype(bool)
+
+
+def _pack_valid(ok: np.ndarray) -> Optional[np.ndarray]:
+    return None if ok.all() else np.packbits(ok)
+
+
+def _grow(a: np.ndarray, n: int, fill, dtype=None) -> np.ndarray:
+    """Copy of a in dtype, extended to n rows with fill."""
+    out = np.full(n, fill, dtype=dtype or a.dtype)
+    out[:len(a)] = a
+    return out
+
+
+def _parse_bools(s: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    """(truth, known) arrays for a column of booleans or boolean-ish text."""
+    if s.dtype == bool:
+        return s.to_numpy(), np.ones(len(s), dtype=bool)
+    low = s.astype(str).str.strip().str.lower()
+    truth = low.isin(_TRUE).to_numpy()
+    return truth, truth | low.isin(_FALSE).to_numpy()
+
+
+@dataclass
+class Column:
+    kind: str
+    data: np.ndarray
+    categories: Optional[np.ndarray] = None  # dict columns only
+    valid: Optional[np.ndarray] = None       # packed validity bits, None when nothing is missing
+
+    def nbytes(self) -> int:
+        n = self.data.nbytes + (self.valid.nbytes if self.valid is not None else 0)
+        if self.categories is not None:
+            n += self.categories.nbytes
+        return int(n)
+
+
+def _concat(chunks: List[np.ndarray], dtype) -> np.ndarray:
+    return np.concatenate(chunks) if chunks else np.empty(0, dtype=dtype)
+
+
+class _DictBuilder:
+    """Dictionary-encodes chunks against one running category table."""
+
+    def __init__(self):
+        self.lookup: Dict[Any, int] = {}
+        self.chunks: List[np.ndarray] = []
+
+    def append(self, s: pd.Series) -> None:
+        codes, uniques = pd.factorize(s)
+        remap = np.array([self.lookup.setdefault(u, len(self.lookup)) for u in uniques] + [-1], dtype=np.int32)
+        # chunk-local code -1 (missing) picks the trailing -1
+        self.chunks.append(remap[codes])
+
+    def finish(self) -> Column:
+        cats = list(self.lookup)
+        # sorted categories, so the encoding does not depend on chunking
+        order = sorted(range(len(cats)), key=lambda i: str(cats[i]))
+        new_code = np.empty(len(cats) + 1, dtype=np.int64)
+        new_code[order] = np.arange(len(cats))
+        new_code[-1] = -1
+        codes = new_code[_concat(self.chunks, np.int32)]
+        return Column("dict", codes.astype(_int_dtype(-1, max(len(cats) - 1, 0))),
+                      categories=np.asarray([str(cats[i]) for i in order], dtype=str))
+
+
+class _TextBuilder:
+    """Unique-ish ASCII text (FEED_ID) as fixed-width bytes, anything else as a dictionary.
+
+    The choice is made on the first chunk and falls back to a dictionary if
+    a later chunk has nulls or non-ASCII text.
+    """
+
+    def __init__(self):
+        self.chunks: List[np.ndarray] = []
+        self.dict: Optional[_DictBuilder] = None
+
+    def append(self, s: pd.Series) -> None:
+        if self.dict is None and s.notna().all():
+            strs = s.astype(str)
+            unique_ish = bool(self.chunks) or (len(s) > 0 and s.nunique() > len(s) // 2)
+            if unique_ish and strs.map(str.isascii).all():
+                self.chunks.append(strs.to_numpy(dtype=bytes))
+                return
+        if self.dict is None:
+            self.dict = _DictBuilder()
+            for c in self.chunks:
+                self.dict.append(pd.Series(c.astype(str), dtype=object))
+            self.chunks = []
+        self.dict.append(s)
+
+    def finish(self) -> Column:
+        if self.dict is not None:
+            return self.dict.finish()
+        if not self.chunks:
+            return _DictBuilder().finish()
+        return Column("bytes", np.concatenate(self.chunks))
+
+
+class _FloatBuilder:
+    def __init__(self):
+        self.chunks: List[np.ndarray] = []
+
+    def append(self, s: pd.Series) -> None:
+        # float64 keeps values like 29.97 exact, float32 would not
+        self.chunks.append(pd.to_numeric(s, errors="coerce").to_numpy(dtype=np.float64))
+
+    def finish(self) -> Column:
+        return Column("float", _concat(self.chunks, np.float64))
+
+
+class _IntBuilder:
+    """Narrowest int dtype for the whole column, missing values tracked in validity bits.
+
+    Switches to float if a chunk has non-integral values.
+    """
+
+    def __init__(self):
+        self.chunks: List[np.ndarray] = []
+        self.valid: List[np.ndarray] = []
+        self.float: Optional[_FloatBuilder] = None
+
+    def append(self, s: pd.Series) -> None:
+        v = pd.to_numeric(s, errors="coerce")
+        if self.float is None:
+            vals = v.fillna(0).to_numpy(dtype=np.float64)
+            if np.all(vals == np.round(vals)):
+                self.chunks.append(vals.astype(np.int64))
+                self.valid.append(v.notna().to_numpy())
+                return
+            self.float = _FloatBuilder()
+            for c, ok in zip(self.chunks, self.valid):
+                self.float.chunks.append(np.where(ok, c.astype(np.float64), np.nan))
+            self.chunks, self.valid = [], []
+        self.float.append(v)
+
+    def finish(self) -> Column:
+        if self.float is not None:
+            return self.float.finish()
+        vals = _concat(self.chunks, np.int64)
+        ok = _concat(self.valid, bool)
+        lo, hi = (int(vals.min()), int(vals.max())) if len(vals) else (0, 0)
+        return Column("int", vals.astype(_int_dtype(lo, hi)), valid=None if ok.all() else np.packbits(ok))
+
+
+class _BoolBuilder:
+    def __init__(self):
+        self.truth: List[np.ndarray] = []
+        self.known: List[np.ndarray] = []
+
+    def append(self, s: pd.Series) -> None:
+        truth, known = _parse_bools(s)
+        self.truth.append(truth)
+        self.known.append(known)
+
+    def finish(self) -> Column:
+        known = _concat(self.known, bool)
+        return Column("bool", np.packbits(_concat(self.truth, bool)),
+                      valid=None if known.all() else np.packbits(known))
+
+
+def _write_column(c: Column, n_old: int, n: int, pos: np.ndarray, s: pd.Series) -> Optional[Column]:
+    """c extended to n rows with s written at pos, None when s does not fit the column's kind."""
+    if c.kind == "dict":
+        lookup = {str(k): i for i, k in enumerate(c.categories)}
+        vals = s.astype(object).where(s.notna(), None)
+        codes = np.fromiter((-1 if v is None else lookup.setdefault(str(v), len(lookup)) for v in vals),
+                            dtype=np.int64, count=len(vals))
+        dtype = np.promote_types(c.data.dtype, _int_dtype(-1, max(len(lookup) - 1, 0)))
+        data = _grow(c.data, n, -1, dtype)
+        data[pos] = codes
+        # new categories go at the end, existing codes stay valid
+        cats = c.categories if len(lookup) == len(c.categories) else np.asarray(list(lookup), dtype=str)
+        return Column("dict", data, categories=cats)
+    if c.kind == "bytes":
+        if s.isna().any():
+            return None
+        strs = s.astype(str)
+        if not strs.map(str.isascii).all():
+            return None
+        new = strs.to_numpy(dtype=bytes)
+        width = max(c.data.dtype.itemsize, new.dtype.itemsize)
+        data = _grow(c.data, n, b"", f"S{width}")
+        data[pos] = new
+        return Column("bytes", data)
+    if c.kind == "int":
+        v = pd.to_numeric(s, errors="coerce")
+        vals = v.fillna(0).to_numpy(dtype=np.float64)
+        if not np.all(vals == np.round(vals)):
+            return None
+        ints = vals.astype(np.int64)
+        lo, hi = (int(ints.min()), int(ints.max())) if len(ints) else (0, 0)
+        data = _grow(c.data, n, 0, np.promote_types(c.data.dtype, _int_dtype(lo, hi)))
+        data[pos] = ints
+        ok = _grow(_unpack(c.valid, n_old), n, False)
+        ok[pos] = v.notna().to_numpy()
+        return Column("int", data, valid=_pack_valid(ok))
+    if c.kind == "float":
+        data = _grow(c.data, n, np.nan)
+        data[pos] = pd.to_numeric(s, errors="coerce").to_numpy(dtype=np.float64)
+        return Column("float", data)
+    if c.kind == "bool":
+        truth, known = _parse_bools(s)
+        bits = _grow(_unpack(c.data, n_old), n, False)
+        bits[pos] = truth
+        ok = _grow(_unpack(c.valid, n_old), n, False)
+        ok[pos] = known
+        return Column("bool", np.packbits(bits), valid=_pack_valid(ok))
+    return None
+
+
+_BUILDERS = {"dict": _DictBuilder, "text": _TextBuilder, "int": _IntBuilder,
+             "float": _FloatBuilder, "bool": _BoolBuilder}
+
+
+class FeedColumnsBuilder:
+    """Appends frame chunks column by column, finish() returns the FeedColumns.
+
+    Only the encoded chunks are kept, never the parsed frames.
+    """
+
+    def __init__(self, table_defs: Optional[pd.DataFrame] = None):
+        self.kinds = def_kinds(table_defs)
+        self.builders: Dict[str, Any] = {}
+        self.order: List[str] = []
+        self.n = 0
+
+    def append(self, df: pd.DataFrame) -> None:
+        if not self.order:
+            self.order = list(df.columns)
+            for name in self.order:
+                kind = self.kinds.get(name) or ("float" if pd.api.types.is_numeric_dtype(df[name]) else "text")
+                self.builders[name] = _BUILDERS[kind]()
+        for name in self.order:
+            self.builders[name].append(df[name])
+        self.n += len(df)
+
+    def finish(self) -> "FeedColumns":
+        return FeedColumns(self.n, {name: b.finish() for name, b in self.builders.items()}, self.order)
+
+
+def def_kinds(table_defs: Optional[pd.DataFrame]) -> Dict[str, str]:
+    if table_defs is None or "header" not in table_defs.columns:
+        return {}
+    return {str(r.header): DEF_KINDS.get(str(r.type).strip().lower(), "text")
+            for r in table_defs.itertuples(index=False)}
+
+
+class FeedColumns:
+    """Typed, dictionary-encoded columnar copy of the feeds table.
+
+    Column kinds come from the table definitions; columns without a
+    definition are stored as float when numeric, dictionary text otherwise.
+    """
+
+    def __init__(self, n: int, columns: Dict[str, Column], order: List[str]):
+        self.n = n
+        self.columns = columns
+        self.order = order
+
+    def __len__(self) -> int:
+        return self.n
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, table_defs: Optional[pd.DataFrame] = None) -> "FeedColumns":
+        b = FeedColumnsBuilder(table_defs)
+        b.append(df)
+        if not b.order:  # no columns at all
+            return cls(len(df), {}, [])
+        return b.finish()
+
+    def to_arrays(self) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+        """(meta, arrays) for snapshotting, every array is plain and pickle-free."""
+        arrays: Dict[str, np.ndarray] = {}
+        kinds: Dict[str, str] = {}
+        for name, c in self.columns.items():
+            kinds[name] = c.kind
+            arrays[f"{name}.data"] = c.data
+            if c.categories is not None:
+                arrays[f"{name}.categories"] = c.categories
+            if c.valid is not None:
+                arrays[f"{name}.valid"] = c.valid
+        return {"n": self.n, "order": self.order, "kinds": kinds}, arrays
+
+    @classmethod
+    def from_arrays(cls, meta: Dict[str, Any], arrays: Dict[str, np.ndarray]) -> "FeedColumns":
+        cols = {
+            name: Column(kind, arrays[f"{name}.data"],
+                         categories=arrays.get(f"{name}.categories"),
+                         valid=arrays.get(f"{name}.valid"))
+            for name, kind in meta["kinds"].items()
+        }
+        return cls(int(meta["n"]), cols, list(meta["order"]))
+
+    def has(self, name: str) -> bool:
+        return name in self.columns
+
+    def numeric(self, name: str, pos: Optional[np.ndarray] = None) -> np.ndarray:
+        """float64 values (NaN where missing) of a numeric or bool column."""
+        c = self.columns[name]
+        idx = np.arange(self.n) if pos is None else np.asarray(pos, dtype=np.intp)
+        if c.kind == "bool":
+            out = get_bits(c.data, idx).astype(np.float64)
+        else:
+            out = c.data[idx].astype(np.float64)
+        if c.valid is not None:
+            out[~get_bits(c.valid, idx)] = np.nan
+        return out
+
+    def strings(self, name: str, pos: Optional[np.ndarray] = None) -> np.ndarray:
+        """Decoded text as an object array, None where missing."""
+        c = self.columns[name]
+        data = c.data if pos is None else c.data[pos]
+        if c.kind == "bytes":
+            return data.astype(str).astype(object)
+        if c.kind == "dict":
+            # code -1 (missing) picks the trailing None
+            return np.append(c.categories.astype(object), None)[data]
+        return self.values(name, pos)
+
+    def values(self, name: str, pos: Optional[np.ndarray] = None) -> np.ndarray:
+        """Decoded values with the dtypes pandas would give the CSV column."""
+        c = self.columns[name]
+        if c.kind in ("dict", "bytes"):
+            return self.strings(name, pos)
+        idx = np.arange(self.n) if pos is None else np.asarray(pos, dtype=np.intp)
+        if c.kind == "bool":
+            vals = get_bits(c.data, idx)
+            if c.valid is None:
+                return vals
+            out = vals.astype(object)
+            out[~get_bits(c.valid, idx)] = None
+            return out
+        if c.kind == "int" and c.valid is None:
+            return c.data[idx].astype(np.int64)
+        return self.numeric(name, idx)
+
+    def take(self, pos: np.ndarray) -> pd.DataFrame:
+        """Materialize only the rows at pos."""
+        pos = np.asarray(pos, dtype=np.intp)
+        return pd.DataFrame({name: self.values(name, pos) for name in self.order})
+
+    def to_frame(self) -> pd.DataFrame:
+        return self.take(np.arange(self.n))
+
+    def write(self, pos: np.ndarray, df: pd.DataFrame, table_defs: Optional[pd.DataFrame] = None) -> "FeedColumns":
+        """New store with the rows of df written at positions pos.
+
+        Positions >= len(self) append, they must continue the table without
+        gaps. df is already normalized and has every column. Arrays are
+        copied, never written in place, so readers of this store (or of a
+        memory-mapped snapshot) are unaffected. Columns keep their encoding
+        where the new values fit it, widening dtypes or adding categories as
+        needed; anything else re-encodes that one column.
+        """
+        pos = np.asarray(pos, dtype=np.intp)
+        n = max(self.n, int(pos.max()) + 1) if len(pos) else self.n
+        assert n - self.n == int((pos >= self.n).sum()), "appended rows must follow the table"
+        cols = {}
+        for name in self.order:
+            c = _write_column(self.columns[name], self.n, n, pos, df[name])
+            if c is None:
+                c = self._reencode(name, n, pos, df[name], table_defs)
+            cols[name] = c
+        return FeedColumns(n, cols, self.order)
+
+    def _reencode(self, name: str, n: int, pos: np.ndarray, s: pd.Series,
+                  table_defs: Optional[pd.DataFrame]) -> Column:
+        # slow path, decode the column, patch it and build it again
+        vals = np.empty(n, dtype=object)
+        vals[:self.n] = self.values(name)
+        vals[pos] = s.to_numpy(dtype=object)
+        full = pd.Series(vals)
+        c = self.columns[name]
+        kind = def_kinds(table_defs).get(name) or ("float" if c.kind in ("int", "float") else "text")
+        if kind in ("int", "float"):
+            full = pd.to_numeric(full, errors="coerce")
+        b = _BUILDERS[kind]()
+        b.append(full)
+        return b.finish()
+
+    def delete(self, pos: np.ndarray) -> "FeedColumns":
+        """New store without the rows at pos, later rows move up."""
+        keep = np.ones(self.n, dtype=bool)
+        keep[np.asarray(pos, dtype=np.intp)] = False
+        n = int(keep.sum())
+        cols = {}
+        for name, c in self.columns.items():
+            if c.kind == "bool":
+                data = np.packbits(_unpack(c.data, self.n)[keep])
+            else:
+                data = c.data[keep]
+            valid = None if c.valid is None else _pack_valid(_unpack(c.valid, self.n)[keep])
+            cols[name] = Column(c.kind, data, categories=c.categories, valid=valid)
+        return FeedColumns(n, cols, self.order)
+
+    def nbytes(self) -> int:
+        return sum(c.nbytes() for c in self.columns.values())
+
+    def memory_report(self) -> Dict[str, Any]:
+        return {name: {"kind": c.kind, "dtype": str(c.data.dtype), "bytes": c.nbytes()}
+                for name, c in self.columns.items()}
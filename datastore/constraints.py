@@ -0,0 +1,245 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import json, os
+import numpy as np
+from .columnar import FeedColumns, get_bits
+
+# Decoder constraint rules. Each rule names a check, the check turns the feed
+# columns and its limits into a violation mask over the whole selection at
+# once. Limits come from the decoder params, the rule's own params fill in
+# what the decoder does not set, so one rule set serves every decoder profile.
+
+SEVERITIES = ("warn", "error")
+
+DEFAULT_RULES: List[Dict[str, Any]] = [
+    {"kind": "resolution_cap", "check": "resolution_cap", "severity": "error"},
+    {"kind": "codec_unknown", "check": "codec_support", "severity": "warn",
+     "params": {"codecs": ["H265", "HEVC", "H264", "AVC"]}},
+    {"kind": "fps_high", "check": "fps_max", "severity": "warn", "params": {"max_fps": 60}},
+    {"kind": "fps_buffer", "check": "fps_buffer", "severity": "warn"},
+    {"kind": "latency_budget", "check": "latency", "severity": "warn"},
+]
+
+
+@dataclass(frozen=True)
+class Rule:
+    kind: str
+    check: str
+    severity: str = "warn"
+    params: Dict[str, Any] = field(default_factory=dict)
+
+    def limit(self, name: str, decoder: Dict[str, Any]) -> Any:
+        """The decoder param, else the rule param of the same name, else None."""
+        v = decoder.get(name)
+        return self.params.get(name) if v is None else v
+
+
+@dataclass
+class RuleHits:
+    """Rows of one selection that violate one rule, in table order."""
+    rule: Rule
+    pos: np.ndarray
+    details: List[str]
+
+
+def parse_rules(raw: List[Dict[str, Any]]) -> List[Rule]:
+    rules = []
+    for r in raw:
+        check = r.get("check", r.get("kind"))
+        if check not in CHECKS:
+            raise ValueError(f"unknown constraint check {check!r}, expected one of {sorted(CHECKS)}")
+        severity = r.get("severity", "warn")
+        if severity not in SEVERITIES:
+            raise ValueError(f"rule {r.get('kind')!r}: severity must be one of {SEVERITIES}")
+        rules.append(Rule(kind=str(r.get("kind", check)), check=check, severity=severity,
+                          params=dict(r.get("params") or {})))
+    return rules
+
+
+def load_rules(path: str) -> List[Rule]:
+    """Rules from a JSON file ({"rules": [...]}), DEFAULT_RULES when it does not exist."""
+    if not os.path.exists(path):
+        return parse_rules(DEFAULT_RULES)
+    with open(path, "r") as f:
+        return parse_rules(json.load(f)["rules"])
+
+
+class _Rows:
+    """Column values of a selection, gathered once and shared by every check."""
+
+    def __init__(self, cols: FeedColumns, pos: np.ndarray):
+        self.cols, self.pos = cols, pos
+        self._cache: Dict[str, np.ndarray] = {}
+
+    def num(self, name: str) -> np.ndarray:
+        if name not in self._cache:
+            self._cache[name] = (self.cols.numeric(name, self.pos) if self.cols.has(name)
+                                 else np.full(len(self.pos), np.nan))
+        return self._cache[name]
+
+    def codec(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(distinct upper-cased codecs, code per row), "" for a missing codec."""
+        if "CODEC" not in self._cache:
+            c = self.cols.columns.get("CODEC")
+            if c is not None and c.kind == "dict":
+                # code -1 (missing) picks the trailing ""
+                cats = np.array([str(v).upper() for v in c.categories] + [""], dtype=object)
+                codes = c.data[self.pos].astype(np.intp)
+                codes[codes < 0] = len(cats) - 1
+            else:
+                values = (self.cols.strings("CODEC", self.pos) if c is not None
+                          else np.full(len(self.pos), None, dtype=object))
+                upper = np.array(["" if v is None else str(v).upper() for v in values], dtype=object)
+                cats, codes = np.unique(upper.astype(str), return_inverse=True)
+                cats = cats.astype(object)
+            self._cache["CODEC"] = (cats, codes)
+        return self._cache["CODEC"]
+
+
+# check -> fn(rows, rule, decoder) returning (violation mask, hit indices -> details),
+# None when a limit it needs is not set
+Details = Callable[[np.ndarray], List[str]]
+Check = Callable[[_Rows, Rule, Dict[str, Any]], Optional[Tuple[np.ndarray, Details]]]
+
+
+def _resolution_cap(rows: _Rows, rule: Rule, dec: Dict[str, Any]):
+    cap_w, cap_h = rule.limit("cap_max_res_w", dec), rule.limit("cap_max_res_h", dec)
+    if cap_w is None and cap_h is None:
+        return None
+    cap_w, cap_h = cap_w or 10**9, cap_h or 10**9
+    w, h = rows.num("RES_W"), rows.num("RES_H")
+    mask = (w > 0) & (h > 0) & ((w > cap_w) | (h > cap_h))
+    return mask, lambda hits: [f"{a}x{b} exceeds decoder cap {cap_w}x{cap_h}"
+                               for a, b in zip(w[hits].astype(np.int64).tolist(), h[hits].astype(np.int64).tolist())]
+
+
+def _codec_support(rows: _Rows, rule: Rule, dec: Dict[str, Any]):
+    allowed = rule.limit("codecs", dec)
+    if allowed is None:
+        return None
+    allowed = sorted({str(c).upper() for c in allowed})
+    cats, codes = rows.codec()
+    # decided once per distinct codec, then looked up per row; a missing
+    # codec is unknown too and reads NAN, as list_feeds shows it
+    bad = np.array([c not in allowed for c in cats], dtype=bool)
+    shown = np.array([c or "NAN" for c in cats], dtype=object)
+    return bad[codes], lambda hits: [f"Codec {c} not in allowlist {allowed}. Verify support." for c in shown[codes[hits]]]
+
+
+def _fps_max(rows: _Rows, rule: Rule, dec: Dict[str, Any]):
+    max_fps = rule.limit("max_fps", dec)
+    if max_fps is None:
+        return None
+    fps = rows.num("FRRATE")
+    return fps > max_fps, lambda hits: [f"{f} fps may require tighter jitter buffer or reorder settings."
+                                        for f in fps[hits].tolist()]
+
+
+def _fps_buffer(rows: _Rows, rule: Rule, dec: Dict[str, Any]):
+    # frames held by the jitter buffer at the feed's rate must fit the decoded picture buffer
+    jitter, dpb = rule.limit("jitter_buf_ms", dec), rule.limit("dpb_size", dec)
+    if jitter is None or dpb is None:
+        return None
+    fps = rows.num("FRRATE")
+    frames = fps * jitter / 1000.0
+    return frames > dpb, lambda hits: [f"{f} fps holds {n:.1f} frames in a {jitter} ms jitter buffer, "
+                                       f"more than dpb_size {dpb}"
+                                       for f, n in zip(fps[hits].tolist(), frames[hits].tolist())]
+
+
+def _latency(rows: _Rows, rule: Rule, dec: Dict[str, Any]):
+    # source latency plus the decoder's jitter buffer against the output latency budget
+    budget = rule.limit("max_output_latency_ms", dec)
+    if budget is None:
+        return None
+    jitter = rule.limit("jitter_buf_ms", dec) or 0
+    lat = rows.num("LAT_MS")
+    total = lat + jitter
+    return total > budget, lambda hits: [f"LAT_MS {v} + {jitter} ms jitter buffer exceeds the {budget} ms "
+                                         f"output latency budget" for v in lat[hits].astype(np.int64).tolist()]
+
+
+CHECKS: Dict[str, Check] = {
+    "resolution_cap": _resolution_cap,
+    "codec_support": _codec_support,
+    "fps_max": _fps_max,
+    "fps_buffer": _fps_buffer,
+    "latency": _latency,
+}
+
+
+def rule_masks(rows: _Rows, rules: List[Rule],
+               decoder: Dict[str, Any]) -> List[Tuple[Rule, np.ndarray, Details]]:
+    """(rule, violation mask over the rows, detail fn) for every rule that has its limits set."""
+    out = []
+    for rule in rules:
+        res = CHECKS[rule.check](rows, rule, decoder)
+        if res is not None:
+            out.append((rule, res[0], res[1]))
+    return out
+
+
+def evaluate(cols: FeedColumns, pos: np.ndarray, rules: List[Rule], decoder: Dict[str, Any]) -> List[RuleHits]:
+    """Violations of every rule over the rows at pos (sorted), grouped by rule."""
+    out = []
+    for rule, mask, detail in rule_masks(_Rows(cols, pos), rules, decoder):
+        hits = np.flatnonzero(mask)
+        out.append(RuleHits(rule, pos[hits], detail(hits)))
+    return out
+
+
+# Decoder profiles: named decoder classes (thin clients, workstations, edge
+# boxes), each the base decoder params with its own overrides.
+
+def load_profiles(path: str, base: Dict[str, Any], rules: List[Rule]) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+    """(profiles, blocking rule kinds) from a JSON file.
+
+    {"blocking": [kinds], "profiles": {name: {decoder param overrides}}}. The
+    base decoder is always the "default" profile. A feed is playable on a
+    profile when none of the blocking rules fire; blocking defaults to the
+    error-severity rules.
+    """
+    raw: Dict[str, Any] = {}
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            raw = json.load(f)
+    kinds = {r.kind for r in rules}
+    blocking = raw.get("blocking")
+    if blocking is None:
+        blocking = [r.kind for r in rules if r.severity == "error"]
+    unknown = sorted(set(blocking) - kinds)
+    if unknown:
+        raise ValueError(f"decoder profiles: blocking names unknown rules {unknown}")
+    profiles = {"default": dict(base)}
+    for name, overrides in (raw.get("profiles") or {}).items():
+        profiles[str(name)] = {**base, **overrides}
+    return profiles, list(blocking)
+
+
+@dataclass
+class CompatibilityMatrix:
+    """Feeds x decoder profiles playability, one np.packbits row of feed bits per profile."""
+    data_version: int
+    profiles: List[str]
+    n: int
+    bits: np.ndarray  # (profiles, ceil(n / 8)) uint8
+
+    @classmethod
+    def build(cls, cols: FeedColumns, profiles: Dict[str, Dict[str, Any]], rules: List[Rule],
+              blocking: List[str], data_version: int) -> "CompatibilityMatrix":
+        # the column values are gathered once and every profile's masks reuse them
+        rows = _Rows(cols, np.arange(len(cols)))
+        block = [r for r in rules if r.kind in set(blocking)]
+        ok = np.ones((len(profiles), len(cols)), dtype=bool)
+        for k, decoder in enumerate(profiles.values()):
+            for _, mask, _ in rule_masks(rows, block, decoder):
+                ok[k] &= ~mask
+        return cls(data_version, list(profiles), len(cols), np.packbits(ok, axis=1))
+
+    def playable(self, profile: str, pos: np.ndarray | None = None) -> np.ndarray:
+        """Bool per row at pos (all rows when None), True when the profile can play it."""
+        row = self.bits[self.profiles.index(profile)]
+        if pos is None:
+            return np.unpackbits(row, count=self.n).astype(bool)
+        return get_bits(row, pos)
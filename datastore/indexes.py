@@ -0,0 +1,337 @@
+from __future__ import annotations
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from .columnar import FeedColumns
+
+EMPTY = np.empty(0, dtype=np.intp)
+
+
+def intersect(a: Optional[np.ndarray], b: np.ndarray) -> np.ndarray:
+    """Intersect two sorted position arrays, a=None meaning all rows."""
+    if a is None:
+        return b
+    return np.intersect1d(a, b, assume_unique=True)
+
+
+def pos_dtype(n: int):
+    # positions fit int32 for any realistic table, halving index size
+    return np.int32 if n < 2**31 else np.int64
+
+
+def member(p: np.ndarray, sorted_pos: np.ndarray) -> np.ndarray:
+    """Mask of p's entries present in sorted_pos, by binary search."""
+    if not len(sorted_pos):
+        return np.zeros(len(p), dtype=bool)
+    i = np.minimum(np.searchsorted(sorted_pos, p), len(sorted_pos) - 1)
+    return sorted_pos[i] == p
+
+
+def remap(p: np.ndarray, deleted: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(positions after deleting rows, keep mask over p), p keeps its order and dtype."""
+    keep = ~member(p, deleted)
+    p = p[keep]
+    return (p - np.searchsorted(deleted, p)).astype(p.dtype), keep
+
+
+class CategoryIndex:
+    """Value -> sorted row positions for a low-cardinality column.
+
+    Keys are matched case-insensitively. Equality lookups are a dict hit;
+    substring matching only scans the distinct keys, never the rows.
+    """
+
+    def __init__(self, postings: Dict[str, np.ndarray]):
+        self.postings = postings
+
+    @classmethod
+    def from_codes(cls, codes: np.ndarray, categories: Iterable) -> "CategoryIndex":
+        # codes index into categories, -1 marks a missing value
+        codes = np.asarray(codes)
+        categories = list(categories)
+        order = np.argsort(codes, kind="stable").astype(pos_dtype(len(codes)))
+        counts = np.bincount(codes[codes >= 0].astype(np.intp), minlength=len(categories))
+        start = int((codes < 0).sum())  # missing values sort first, skip them
+        postings: Dict[str, np.ndarray] = {}
+        for key, cnt in zip(categories, counts):
+            k = str(key).upper()
+            pos = order[start:start + cnt]
+            start += cnt
+            # keys differing only by case share one posting list
+            postings[k] = np.union1d(postings[k], pos) if k in postings else pos
+        return cls(postings)
+
+    @classmethod
+    def from_values(cls, values: Iterable) -> "CategoryIndex":
+        codes, uniques = pd.factorize(pd.Series(values, dtype=object), sort=True)
+        return cls.from_codes(codes, uniques)
+
+    def keys(self) -> List[str]:
+        return list(self.postings)
+
+    def lookup(self, value: str) -> np.ndarray:
+        return self.postings.get(str(value).upper(), EMPTY)
+
+    def lookup_many(self, values: Iterable[str]) -> np.ndarray:
+        hits = [self.lookup(v) for v in values]
+        return np.unique(np.concatenate(hits)) if hits else EMPTY
+
+    def contains(self, substr: str) -> np.ndarray:
+        needle = str(substr).upper()
+        return self.lookup_many(k for k in self.postings if needle in k)
+
+    def moved(self, pos: np.ndarray, old_keys: np.ndarray, new_keys: np.ndarray, n: int) -> "CategoryIndex":
+        """New index with rows pos moved from old_keys to new_keys (None for absent or missing).
+
+        Only the posting lists of the keys involved are touched.
+        """
+        postings = dict(self.postings)
+        for keys, add in ((old_keys, False), (new_keys, True)):
+            keys = pd.Series(keys, dtype=object)
+            ok = keys.notna().to_numpy()
+            upper = keys[ok].astype(str).str.upper().to_numpy()
+            for k in pd.unique(upper):
+                sel = np.sort(pos[ok][upper == k])
+                cur = postings.get(k, EMPTY)
+                if add:
+                    cur = np.insert(cur, np.searchsorted(cur, sel), sel).astype(pos_dtype(n))
+                else:
+                    cur = cur[~member(cur, sel)]
+                postings[k] = cur
+        return CategoryIndex(postings)
+
+    def remapped(self, deleted: np.ndarray) -> "CategoryIndex":
+        return CategoryIndex({k: remap(p, deleted)[0] for k, p in self.postings.items()})
+
+    def to_arrays(self, prefix: str) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+        keys = self.keys()
+        lists = [self.postings[k] for k in keys]
+        offsets = np.cumsum([0] + [len(p) for p in lists]).astype(np.int64)
+        flat = np.concatenate(lists) if lists else EMPTY
+        return {"keys": keys}, {f"{prefix}.postings": flat, f"{prefix}.offsets": offsets}
+
+    @classmethod
+    def from_arrays(cls, meta: Dict[str, Any], arrays: Dict[str, np.ndarray], prefix: str) -> "CategoryIndex":
+        flat, off = arrays[f"{prefix}.postings"], arrays[f"{prefix}.offsets"]
+        # slices are views, so a memory-mapped snapshot stays shared
+        return cls({k: flat[off[i]:off[i + 1]] for i, k in enumerate(meta["keys"])})
+
+
+class RangeIndex:
+    """Row positions sorted by a numeric column, so range predicates are binary searches.
+
+    Missing values are left out, they never satisfy a bound. Sorted values
+    keep the column's own dtype (int16 for RES_W and so on).
+    """
+
+    def __init__(self, order: np.ndarray, sorted_values: np.ndarray):
+        self.order = order
+        self.sorted_values = sorted_values
+
+    @classmethod
+    def build(cls, values: np.ndarray, dtype=None) -> "RangeIndex":
+        v = np.asarray(values, dtype=float)
+        valid = np.flatnonzero(~np.isnan(v))
+        order = valid[np.argsort(v[valid], kind="stable")].astype(pos_dtype(len(v)))
+        return cls(order, v[order].astype(dtype or np.float64))
+
+    def range(self, lo: Optional[float] = None, hi: Optional[float] = None) -> np.ndarray:
+        """Sorted positions with lo <= value <= hi, either bound optional."""
+        i = 0 if lo is None else int(np.searchsorted(self.sorted_values, lo, side="left"))
+        j = len(self.order) if hi is None else int(np.searchsorted(self.sorted_values, hi, side="right"))
+        return np.sort(self.order[i:j]) if i < j else EMPTY
+
+    def moved(self, pos: np.ndarray, old_values: np.ndarray, new_values: np.ndarray, dtype=None) -> "RangeIndex":
+        """New index with the entries of rows pos replaced by new_values (NaN for absent or missing).
+
+        Each old entry is found by binary search on its value, so only the
+        run of equal values is scanned.
+        """
+        order, values = self.order, self.sorted_values
+        old_values = np.asarray(old_values, dtype=float)
+        drop = []
+        for p, v in zip(pos, old_values):
+            if np.isnan(v):
+                continue
+            lo = int(np.searchsorted(values, v, side="left"))
+            hi = int(np.searchsorted(values, v, side="right"))
+            hit = np.flatnonzero(order[lo:hi] == p)
+            if len(hit):
+                drop.append(lo + int(hit[0]))
+        if drop:
+            order, values = np.delete(order, drop), np.delete(values, drop)
+        new_values = np.asarray(new_values, dtype=float)
+        ok = ~np.isnan(new_values)
+        add_pos, add_vals = np.asarray(pos)[ok], new_values[ok]
+        srt = np.argsort(add_vals, kind="stable")
+        add_pos, add_vals = add_pos[srt], add_vals[srt]
+        values = values.astype(dtype or values.dtype)
+        at = np.searchsorted(values, add_vals, side="right")
+        return RangeIndex(np.insert(order, at, add_pos), np.insert(values, at, add_vals))
+
+    def remapped(self, deleted: np.ndarray) -> "RangeIndex":
+        order, keep = remap(self.order, deleted)
+        return RangeIndex(order, self.sorted_values[keep])
+
+
+class IdIndex:
+    """FEED_ID -> row position by binary search over an argsort of the ids.
+
+    Arrays only (no Python dict), so it can live in a shared memory map.
+    """
+
+    def __init__(self, ids: np.ndarray, order: np.ndarray):
+        self.ids = ids
+        self.order = order
+
+    @classmethod
+    def build(cls, ids: np.ndarray) -> "IdIndex":
+        return cls(ids, np.argsort(ids, kind="stable").astype(pos_dtype(len(ids))))
+
+    def ranks(self) -> np.ndarray:
+        """Rank of each row's id in sorted id order, an integer stand-in for sorting by id."""
+        out = np.empty(len(self.order), dtype=self.order.dtype)
+        out[self.order] = np.arange(len(self.order), dtype=self.order.dtype)
+        return out
+
+    def lookup(self, feed_ids: Iterable[str]) -> np.ndarray:
+        """Row position per id in input order, -1 for unknown ids."""
+        feed_ids = [str(f) for f in feed_ids]
+        out = np.full(len(feed_ids), -1, dtype=np.intp)
+        kind = self.ids.dtype.kind
+        width = self.ids.dtype.itemsize // (4 if kind == "U" else 1)
+        # longer ids cannot match and would be truncated by the fixed-width cast
+        at = [i for i, f in enumerate(feed_ids) if len(f) <= width and (kind != "S" or f.isascii())]
+        if not at or not len(self.ids):
+            return out
+        q = [feed_ids[i].encode() if kind == "S" else feed_ids[i] for i in at]
+        q = np.asarray(q, dtype=self.ids.dtype)
+        i = np.minimum(np.searchsorted(self.ids, q, sorter=self.order), len(self.ids) - 1)
+        cand = self.order[i]
+        hit = self.ids[cand] == q
+        out[np.asarray(at)[hit]] = cand[hit]
+        return out
+
+    def positions(self, feed_ids: Iterable[str]) -> np.ndarray:
+        """Sorted row positions of the known ids, unknown ids are ignored."""
+        pos = self.lookup(feed_ids)
+        return np.unique(pos[pos >= 0])
+
+    def appended(self, ids: np.ndarray, pos: np.ndarray) -> "IdIndex":
+        """New index over ids (the grown id column) with rows pos added."""
+        pos = np.asarray(pos, dtype=np.intp)
+        srt = pos[np.argsort(ids[pos], kind="stable")]
+        # the sorter only covers the rows already indexed
+        at = np.searchsorted(ids[:len(self.order)], ids[srt], sorter=self.order)
+        return IdIndex(ids, np.insert(self.order, at, srt).astype(pos_dtype(len(ids))))
+
+
+# column -> (min filter, max filter), bounds are inclusive
+RANGE_FILTERS = {
+    "RES_W": ("min_res_w", "max_res_w"),
+    "RES_H": ("min_res_h", "max_res_h"),
+    "FRRATE": ("min_fps", "max_fps"),
+    "LAT_MS": ("min_lat_ms", "max_lat_ms"),
+}
+
+
+class FeedIndexes:
+    """Indexes over the feeds table, built once per load and saved with the snapshot."""
+
+    def __init__(self, ids: np.ndarray, id_index: IdIndex, theater: CategoryIndex,
+                 codec: CategoryIndex, ranges: Dict[str, RangeIndex]):
+        self.ids = ids
+        self.id_index = id_index
+        self.theater = theater
+        self.codec = codec
+        self.ranges = ranges
+
+    @classmethod
+    def build(cls, cols: FeedColumns) -> "FeedIndexes":
+        ids = cls._ids(cols)
+        ranges = {}
+        for col in RANGE_FILTERS:
+            if cols.has(col):
+                c = cols.columns[col]
+                dtype = c.data.dtype if c.kind in ("int", "float") else None
+                ranges[col] = RangeIndex.build(cols.numeric(col), dtype)
+            else:
+                ranges[col] = RangeIndex.build(np.empty(0))
+        return cls(ids, IdIndex.build(ids), cls._category(cols, "THEATER"),
+                   cls._category(cols, "CODEC"), ranges)
+
+    @staticmethod
+    def _ids(cols: FeedColumns) -> np.ndarray:
+        # fixed-width bytes sort like the strings they encode and are much cheaper
+        c = cols.columns["FEED_ID"]
+        return c.data if c.kind == "bytes" else cols.strings("FEED_ID").astype(str)
+
+    @staticmethod
+    def _category(cols: FeedColumns, name: str) -> CategoryIndex:
+        if not cols.has(name):
+            return CategoryIndex({})
+        c = cols.columns[name]
+        if c.kind == "dict":
+            return CategoryIndex.from_codes(c.data, c.categories)
+        return CategoryIndex.from_values(cols.strings(name))
+
+    def written(self, old: FeedColumns, cols: FeedColumns, pos: np.ndarray) -> "FeedIndexes":
+        """Indexes for cols, which is old with rows pos overwritten or appended."""
+        pos = np.asarray(pos, dtype=np.intp)
+        upd = pos < old.n
+
+        def old_vals(get, name, empty):
+            out = np.full(len(pos), empty, dtype=object if empty is None else float)
+            if old.has(name) and upd.any():
+                out[upd] = get(name, pos[upd])
+            return out
+
+        cats = {}
+        for name in ("theater", "codec"):
+            col = name.upper()
+            new_keys = cols.strings(col, pos) if cols.has(col) else np.full(len(pos), None, dtype=object)
+            cats[name] = getattr(self, name).moved(pos, old_vals(old.strings, col, None), new_keys, cols.n)
+        ranges = {}
+        for col, r in self.ranges.items():
+            if not cols.has(col):
+                ranges[col] = r
+                continue
+            c = cols.columns[col]
+            dtype = c.data.dtype if c.kind in ("int", "float") else np.float64
+            ranges[col] = r.moved(pos, old_vals(old.numeric, col, np.nan), cols.numeric(col, pos), dtype)
+        ids = self._ids(cols)
+        id_index = self.id_index.appended(ids, pos[~upd]) if (~upd).any() else IdIndex(ids, self.id_index.order)
+        return FeedIndexes(ids, id_index, cats["theater"], cats["codec"], ranges)
+
+    def deleted(self, cols: FeedColumns, deleted: np.ndarray) -> "FeedIndexes":
+        """Indexes for cols, the table after deleting the sorted positions `deleted`."""
+        ids = self._ids(cols)
+        return FeedIndexes(ids, IdIndex(ids, remap(self.id_index.order, deleted)[0]),
+                           self.theater.remapped(deleted), self.codec.remapped(deleted),
+                           {col: r.remapped(deleted) for col, r in self.ranges.items()})
+
+    def positions_for_ids(self, feed_ids: Iterable[str]) -> np.ndarray:
+        """Sorted row positions of the known ids, unknown ids are ignored."""
+        return self.id_index.positions(feed_ids)
+
+    def to_arrays(self) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+        meta: Dict[str, Any] = {}
+        arrays: Dict[str, np.ndarray] = {"idx.ids.order": self.id_index.order}
+        for name in ("theater", "codec"):
+            m, a = getattr(self, name).to_arrays(f"idx.{name}")
+            meta[name] = m
+            arrays.update(a)
+        for col, r in self.ranges.items():
+            arrays[f"idx.range.{col}.order"] = r.order
+            arrays[f"idx.range.{col}.values"] = r.sorted_values
+        return meta, arrays
+
+    @classmethod
+    def from_arrays(cls, cols: FeedColumns, meta: Dict[str, Any], arrays: Dict[str, np.ndarray]) -> "FeedIndexes":
+        ids = cls._ids(cols)
+        ranges = {col: RangeIndex(arrays[f"idx.range.{col}.order"], arrays[f"idx.range.{col}.values"])
+                  for col in RANGE_FILTERS}
+        return cls(ids, IdIndex(ids, arrays["idx.ids.order"]),
+                   CategoryIndex.from_arrays(meta["theater"], arrays, "idx.theater"),
+                   CategoryIndex.from_arrays(meta["codec"], arrays, "idx.codec"),
+                   ranges)
@@ -0,0 +1,91 @@
+from __future__ import annotations
+from typing import Any, Callable, Dict, Optional
+import time
+import numpy as np
+import pandas as pd
+from .columnar import FeedColumns, FeedColumnsBuilder
+
+DEFAULT_CHUNKSIZE = 100_000
+
+ProgressFn = Callable[[Dict[str, Any]], None]
+
+
+def normalize_feeds(df: pd.DataFrame) -> pd.DataFrame:
+    """Upper-case CODEC and coerce numeric columns, in place on one chunk."""
+    if "CODEC" in df.columns:
+        df["CODEC"] = df["CODEC"].astype(str).str.upper()
+    for c in ["RES_W", "RES_H", "FRRATE", "LAT_MS"]:
+        if c in df.columns:
+            df[c] = pd.to_numeric(df[c], errors="coerce")
+    return df
+
+
+class _UniqueIds:
+    """Incremental FEED_ID uniqueness check over 64-bit hashes.
+
+    Duplicates inside a chunk fail immediately. Across chunks a hash hit is
+    only a suspect, confirmed against the final column, so no Python set of
+    every id is ever held.
+    """
+
+    def __init__(self):
+        self.hashes = np.empty(0, dtype=np.uint64)
+        self.suspects: set = set()
+
+    def add(self, ids: pd.Series) -> None:
+        dup = ids[ids.duplicated()]
+        assert dup.empty, f"FEED_ID must be unique, duplicate {dup.iloc[0]}"
+        h = pd.util.hash_array(ids.to_numpy(dtype=object))
+        if len(self.hashes):
+            i = np.minimum(np.searchsorted(self.hashes, h), len(self.hashes) - 1)
+            self.suspects.update(ids[self.hashes[i] == h].tolist())
+        h = np.sort(h)
+        self.hashes = np.insert(self.hashes, np.searchsorted(self.hashes, h), h)
+
+    def confirm(self, cols: FeedColumns) -> None:
+        if not self.suspects:
+            return
+        ids = pd.Series(cols.strings("FEED_ID"))
+        counts = ids[ids.isin(self.suspects)].value_counts()
+        dup = counts[counts > 1]
+        assert dup.empty, f"FEED_ID must be unique, duplicate {dup.index[0]}"
+
+
+def ingest_feeds_csv(path: str, table_defs: Optional[pd.DataFrame] = None,
+                     chunksize: int = DEFAULT_CHUNKSIZE, progress: Optional[ProgressFn] = None) -> FeedColumns:
+    """Stream the feeds CSV into a FeedColumns store chunk by chunk.
+
+    Each chunk is parsed, normalized, checked and encoded, then dropped, so
+    peak memory is one parsed chunk plus the compact columns. progress gets
+    a dict per chunk: chunk, rows, total_rows, bytes_read, elapsed_s,
+    rows_per_s, mb_per_s.
+    """
+    builder = FeedColumnsBuilder(table_defs)
+    ids = _UniqueIds()
+    t0 = time.perf_counter()
+    with open(path, "rb") as fh:
+        for i, chunk in enumerate(pd.read_csv(fh, chunksize=chunksize)):
+            normalize_feeds(chunk)
+            assert chunk["FEED_ID"].isna().sum() == 0, "FEED_ID contains nulls"
+            ids.add(chunk["FEED_ID"].astype(str))
+            builder.append(chunk)
+            if progress is not None:
+                elapsed = max(time.perf_counter() - t0, 1e-9)
+                read = fh.tell()
+                progress({
+                    "chunk": i,
+                    "rows": len(chunk),
+                    "total_rows": builder.n,
+                    "bytes_read": read,
+                    "elapsed_s": elapsed,
+                    "rows_per_s": builder.n / elapsed,
+                    "mb_per_s": read / elapsed / 1e6,
+                })
+    cols = builder.finish()
+    ids.confirm(cols)
+    return cols
+
+
+def print_progress(info: Dict[str, Any]) -> None:
+    print(f"chunk {info['chunk']:>4}: {info['total_rows']:>10,} rows  "
+          f"{info['rows_per_s']:>10,.0f} rows/s  {info['mb_per_s']:6.1f} MB/s")
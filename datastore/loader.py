@@ -1,28 +1,232 @@
 from __future__ import annotations
 from typing import Dict, Any, List, Tuple
-import json, os, pandas as pd
+import itertools, json, os, numpy as np, pandas as pd
 from jsonschema import validate as js_validate
 from jsonschema.exceptions import ValidationError
 from .models import TableDefRow, FeedRow, EncoderParams, DecoderParams
-from util.ranking import clarity_score_from_row
+from util.ranking import (
+    CODEC_BONUS_DEFAULT, codec_bonus, combine_components,
+    components_from_arrays, skyline_mask, top_k_order,
+)
+from .columnar import FeedColumns
+from .stats import FeedStats, stat_rows
+from .indexes import FeedIndexes, RANGE_FILTERS, intersect
+from .constraints import CompatibilityMatrix, Rule, RuleHits, evaluate, load_profiles, load_rules
+from .transcode import EncoderMatch
+from .snapshot import read_snapshot, write_snapshot, snapshot_lock, source_stamps
+from .ingest import DEFAULT_CHUNKSIZE, ProgressFn, ingest_feeds_csv, normalize_feeds
+
+# data_version stamps are unique across every store in the process, so a
+# stamp alone identifies one version of the data even across reloads
+_VERSIONS = itertools.count(1)
+
+SOURCE_FILES = [
+    "encoder_schema.json", "decoder_schema.json",
+    "encoder_params.json", "decoder_params.json",
+    "Table_defs_v2.csv", "Table_feeds_v2.csv",
+]
+
+# grouped_top_k buckets rows per group up to this many groups, beyond it one sort over all rows is cheaper
+GROUP_BUCKETS_MAX = 1024
+
+# optional configuration, read on every load (not part of the snapshot), defaults when absent
+CONFIG_FILES = ["constraint_rules.json", "decoder_profiles.json"]
 
 
 class DataStore:
-    def __init__(self, data_dir: str):
+    def __init__(self, data_dir: str, use_snapshot: bool = True, cache_dir: str | None = None,
+                 shared: bool = False, chunksize: int = DEFAULT_CHUNKSIZE,
+                 progress: ProgressFn | None = None):
         self.data_dir = data_dir
+        # feeds CSV is ingested in chunks of this many rows, progress gets per-chunk stats
+        self.chunksize = chunksize
+        self.progress = progress
+        # validated binary snapshot of the sources, skips CSV/JSON parsing on a hit
+        self.use_snapshot = use_snapshot or shared
+        # shared: map the snapshot read-only so every worker process shares one copy
+        self.shared = shared
+        self.cache_dir = cache_dir or os.path.join(data_dir, ".canyon_cache")
         # These will be populated by load_all
         self.table_defs = None
-        self.feeds_df = None
+        self.columns: FeedColumns | None = None
+        self._feeds_df = None
+        self._stats: FeedStats | None = None
+        self._indexes: FeedIndexes | None = None
+        self.data_version = 0
         self.encoder_schema = None
         self.decoder_schema = None
         self.encoder_params = None
         self.decoder_params = None
-        self.ranking_weights = None
+        self.constraint_rules: List[Rule] = []
+        # decoder profile name -> decoder params, and the rule kinds that make a feed unplayable
+        self.decoder_profiles: Dict[str, Dict[str, Any]] = {}
+        self.blocking_rules: List[str] = []
+        self._compat: CompatibilityMatrix | None = None
+        self._encoder_match: EncoderMatch | None = None
+
+    @property
+    def feeds_df(self) -> pd.DataFrame:
+        # The columnar store is the source of truth, the frame is built on first use
+        if self._feeds_df is None and self.columns is not None:
+            self._feeds_df = self.columns.to_frame()
+        return self._feeds_df
+
+    @feeds_df.setter
+    def feeds_df(self, df: pd.DataFrame) -> None:
+        self.set_columns(FeedColumns.from_frame(df, self.table_defs))
+        self._feeds_df = df
+
+    def set_columns(self, columns: FeedColumns) -> None:
+        self.columns = columns
+        self._feeds_df = None
+        self._drop_derived()
+
+    def invalidate(self) -> None:
+        """Rebuild derived state. Call after mutating feeds_df in place."""
+        if self._feeds_df is not None:
+            self.columns = FeedColumns.from_frame(self._feeds_df, self.table_defs)
+        self._drop_derived()
+
+    def _drop_derived(self) -> None:
+        self._stats = None
+        self._indexes = None
+        self.data_version = next(_VERSIONS)
+
+    @property
+    def stats(self) -> FeedStats:
+        if self._stats is None:
+            self._stats = FeedStats.from_columns(self.columns)
+        return self._stats
+
+    @property
+    def indexes(self) -> FeedIndexes:
+        if self._indexes is None:
+            self._indexes = FeedIndexes.build(self.columns)
+        return self._indexes
+
+    def components(self, pos: np.ndarray | None = None):
+        """Normalized (resolution, fps, codec) score components at row positions (all when None).
+
+        Gathered from the columnar store per call, so nothing table-sized is
+        kept per process.
+        """
+        cols = self.columns
+        n = len(cols) if pos is None else len(pos)
+
+        def num(c):
+            return np.nan_to_num(cols.numeric(c, pos), nan=0.0) if cols.has(c) else np.zeros(n)
+
+        return components_from_arrays(num("RES_W"), num("RES_H"), num("FRRATE"),
+                                      self._codec_bonus(pos), *self.stats.norms())
+
+    def _codec_bonus(self, pos: np.ndarray | None = None) -> np.ndarray:
+        cols = self.columns
+        if not cols.has("CODEC"):
+            return np.full(len(cols) if pos is None else len(pos), CODEC_BONUS_DEFAULT)
+        c = cols.columns["CODEC"]
+        if c.kind == "dict":
+            # one lookup per distinct codec, code -1 (missing) gets the default
+            codes = c.data if pos is None else c.data[pos]
+            return np.append(codec_bonus(c.categories), CODEC_BONUS_DEFAULT)[codes]
+        return codec_bonus(cols.strings("CODEC", pos))
+
+    def memory_report(self) -> Dict[str, Any]:
+        """Bytes per feed as a pandas frame vs the columnar store."""
+        n = max(len(self.columns), 1)
+        frame = self.columns.to_frame() if self._feeds_df is None else self._feeds_df
+        frame_bytes = int(frame.memory_usage(deep=True).sum())
+        col_bytes = self.columns.nbytes()
+        return {
+            "rows": len(self.columns),
+            "frame_bytes": frame_bytes,
+            "frame_bytes_per_feed": frame_bytes / n,
+            "columnar_bytes": col_bytes,
+            "columnar_bytes_per_feed": col_bytes / n,
+            "columns": self.columns.memory_report(),
+        }
 
     def _path(self, name: str) -> str:
         return os.path.join(self.data_dir, name)
 
+    def source_paths(self) -> List[str]:
+        return [self._path(n) for n in SOURCE_FILES]
+
+    def config_paths(self) -> List[str]:
+        return [self._path(n) for n in CONFIG_FILES]
+
     def load_all(self) -> None:
+        self._load_data()
+        self._load_config()
+
+    def _load_config(self) -> None:
+        self.constraint_rules = load_rules(self._path("constraint_rules.json"))
+        self.decoder_profiles, self.blocking_rules = load_profiles(
+            self._path("decoder_profiles.json"), self.decoder_params.model_dump(), self.constraint_rules)
+
+    def _load_data(self) -> None:
+        if self.shared:
+            # one process builds the snapshot, the rest wait for it and map it
+            with snapshot_lock(self.cache_dir):
+                if self._load_snapshot():
+                    return
+                stamps = source_stamps(self.source_paths())
+                self._load_sources()
+                self._write_snapshot(stamps)
+            # remap what we just wrote so this process shares the same pages
+            if not self._load_snapshot():
+                print("Warning: shared snapshot unavailable, using a private copy")
+            return
+        if self.use_snapshot and self._load_snapshot():
+            return
+        # stamped before reading, a source that changes mid-load is not snapshotted
+        stamps = source_stamps(self.source_paths()) if self.use_snapshot else None
+        self._load_sources()
+        if self.use_snapshot:
+            self._write_snapshot(stamps)
+
+    def _load_snapshot(self) -> bool:
+        try:
+            snap = read_snapshot(self.cache_dir, self.source_paths(), mmap=self.shared)
+        except (OSError, ValueError, KeyError) as e:
+            print("Warning: ignoring unreadable snapshot:", e)
+            return False
+        if snap is None:
+            return False
+        meta, arrays = snap
+        self.encoder_schema = meta["encoder_schema"]
+        self.decoder_schema = meta["decoder_schema"]
+        # params were schema-validated when the snapshot was written
+        self.encoder_params = EncoderParams(**meta["encoder_params"])
+        self.decoder_params = DecoderParams(**meta["decoder_params"])
+        self.table_defs = pd.DataFrame(meta["table_defs"], columns=meta["table_defs_columns"])
+        self.set_columns(FeedColumns.from_arrays(meta["columns"], arrays))
+        self._stats = FeedStats.from_dict(meta["stats"])
+        self._indexes = FeedIndexes.from_arrays(self.columns, meta["indexes"], arrays)
+        return True
+
+    def _write_snapshot(self, stamps: Dict[str, Dict[str, Any]]) -> None:
+        col_meta, arrays = self.columns.to_arrays()
+        idx_meta, idx_arrays = self.indexes.to_arrays()
+        arrays.update(idx_arrays)
+        defs = self.table_defs.astype(object).where(self.table_defs.notna(), None)
+        meta = {
+            "encoder_schema": self.encoder_schema,
+            "decoder_schema": self.decoder_schema,
+            "encoder_params": self._enc_raw,
+            "decoder_params": self._dec_raw,
+            "table_defs": defs.to_dict(orient="records"),
+            "table_defs_columns": list(self.table_defs.columns),
+            "columns": col_meta,
+            "indexes": idx_meta,
+            "stats": self.stats.as_dict(),
+        }
+        try:
+            if write_snapshot(self.cache_dir, self.source_paths(), stamps, meta, arrays) is None:
+                print("Warning: sources changed while loading, snapshot not written")
+        except OSError as e:
+            print("Warning: could not write snapshot:", e)
+
+    def _load_sources(self) -> None:
         # Load schemas
         with open(self._path("encoder_schema.json"), "r") as f:
             self.encoder_schema = json.load(f)
@@ -47,6 +251,7 @@ class DataStore:
             print("Warning: decoder params failed schema validation:", e)
 
         # Coerce into models
+        self._enc_raw, self._dec_raw = enc_raw, dec_raw
         self.encoder_params = EncoderParams(**enc_raw)
         self.decoder_params = DecoderParams(**dec_raw)
 
@@ -55,54 +260,264 @@ class DataStore:
         feeds_path_csv = self._path("Table_feeds_v2.csv")
 
         self.table_defs = pd.read_csv(defs_path_csv)
-        self.feeds_df = pd.read_csv(feeds_path_csv)
+        # Chunked parse, normalization and FEED_ID checks straight into the columnar store
+        self.set_columns(ingest_feeds_csv(feeds_path_csv, self.table_defs,
+                                          chunksize=self.chunksize, progress=self.progress))
+        self._stats = FeedStats.from_columns(self.columns)
+        self._indexes = FeedIndexes.build(self.columns)
+
+    def upsert_feeds(self, feeds: List[Dict[str, Any]]) -> Dict[str, int]:
+        """Insert or update feeds by FEED_ID without reloading the sources.
+
+        Fields left out of an update keep their current value, fields left
+        out of an insert are missing. Indexes and stats are patched for the
+        touched rows only. Changes are in memory: the next load from the
+        source files replaces them.
+        """
+        if not feeds:
+            return {"inserted": 0, "updated": 0}
+        ids = [f.get("FEED_ID") for f in feeds]
+        if any(i is None or pd.isna(i) for i in ids):
+            raise ValueError("every upserted feed needs a FEED_ID")
+        ids = [str(i) for i in ids]
+        dup = pd.Series(ids)[pd.Series(ids).duplicated()]
+        if not dup.empty:
+            raise ValueError(f"FEED_ID must be unique, duplicate {dup.iloc[0]}")
+        old = self.columns
+        unknown = set().union(*feeds) - set(old.order)
+        if unknown:
+            raise ValueError(f"unknown feed columns: {sorted(unknown)}")
 
-        # Basic normalization
-        if "CODEC" in self.feeds_df.columns:
-            self.feeds_df["CODEC"] = self.feeds_df["CODEC"].astype(str).str.upper()
-        
-        for c in ["RES_W", "RES_H", "FRRATE"]:
-            if c in self.feeds_df.columns:
-                self.feeds_df[c] = pd.to_numeric(self.feeds_df[c], errors="coerce")
+        at = self.indexes.id_index.lookup(ids)
+        upd = at >= 0
+        pos = at.copy()
+        pos[~upd] = np.arange(old.n, old.n + int((~upd).sum()))
+        current = iter(old.take(at[upd]).to_dict(orient="records"))
+        rows = [{**next(current), **f} if u else f for f, u in zip(feeds, upd)]
+        df = normalize_feeds(pd.DataFrame(rows, columns=old.order))
+        df["FEED_ID"] = ids
 
-        # Sanity checks
-        assert self.feeds_df["FEED_ID"].nunique() == len(self.feeds_df), "FEED_ID must be unique"
-        assert self.feeds_df["FEED_ID"].isna().sum() == 0, "FEED_ID contains nulls"
+        cols = old.write(pos, df, self.table_defs)
+        indexes = self.indexes.written(old, cols, pos)
+        stats = self.stats.updated(cols, stat_rows(old, at[upd]), stat_rows(cols, pos),
+                                   indexes.theater.lookup)
+        self._apply_delta(cols, indexes, stats)
+        return {"inserted": int((~upd).sum()), "updated": int(upd.sum())}
+
+    def delete_feeds(self, feed_ids) -> int:
+        """Delete feeds by FEED_ID, unknown ids are ignored. Returns the number deleted."""
+        pos = self.indexes.positions_for_ids(feed_ids)
+        if not len(pos):
+            return 0
+        old = self.columns
+        cols = old.delete(pos)
+        indexes = self.indexes.deleted(cols, pos)
+        stats = self.stats.updated(cols, stat_rows(old, pos), stat_rows(cols, pos[:0]),
+                                   indexes.theater.lookup)
+        self._apply_delta(cols, indexes, stats)
+        return len(pos)
+
+    def _apply_delta(self, cols: FeedColumns, indexes: FeedIndexes, stats: FeedStats) -> None:
+        # everything was built on new arrays, readers of the old ones are unaffected
+        self.columns = cols
+        self._feeds_df = None
+        self._indexes = indexes
+        self._stats = stats
+        self.data_version = next(_VERSIONS)
 
     def get_table_schema(self) -> List[TableDefRow]:
         return [TableDefRow(**row._asdict() if hasattr(row, "_asdict") else dict(row))
                 for _, row in self.table_defs.iterrows()]
 
-    def list_feeds(self, **filters) -> pd.DataFrame:
-        df = self.feeds_df.copy()
-        # Supported filters: THEATER contains, min_res_w, min_res_h, min_fps, codec_in list
+    def take(self, pos: np.ndarray) -> pd.DataFrame:
+        """Materialize the rows at positions pos."""
+        return self.columns.take(pos)
+
+    def feeds_by_id(self, feed_ids) -> pd.DataFrame:
+        """Rows for the given FEED_IDs in table order, unknown ids are skipped."""
+        return self.take(self.indexes.positions_for_ids(feed_ids))
+
+    def select_positions(self, **filters) -> np.ndarray | None:
+        """Sorted row positions matching filters, None when nothing filters.
+
+        Supported filters: theater (exact, or substring with
+        theater_match="contains"), codec_in list, and inclusive numeric
+        bounds min_/max_res_w, min_/max_res_h, min_/max_fps, min_/max_lat_ms.
+        Every predicate is an index lookup, results are intersected.
+        """
+        idx = self.indexes
+        pos = None
         theater = filters.get("theater")
         if theater:
-            df = df[df["THEATER"].str.contains(theater, case=False, na=False)]
-        min_res_w = filters.get("min_res_w")
-        if min_res_w is not None:
-            df = df[df["RES_W"] >= int(min_res_w)]
-        min_res_h = filters.get("min_res_h")
-        if min_res_h is not None:
-            df = df[df["RES_H"] >= int(min_res_h)]
-        min_fps = filters.get("min_fps")
-        if min_fps is not None and "FRRATE" in df.columns:
-            df = df[df["FRRATE"].astype(float) >= float(min_fps)]
+            if filters.get("theater_match") == "contains":
+                pos = intersect(pos, idx.theater.contains(theater))
+            else:
+                pos = intersect(pos, idx.theater.lookup(theater))
         codec_in = filters.get("codec_in")
         if codec_in:
-            codec_upper = [c.upper() for c in codec_in]
-            df = df[df["CODEC"].isin(codec_upper)]
+            pos = intersect(pos, idx.codec.lookup_many(codec_in))
+        for col, (lo_key, hi_key) in RANGE_FILTERS.items():
+            lo, hi = filters.get(lo_key), filters.get(hi_key)
+            if lo is not None or hi is not None:
+                pos = intersect(pos, idx.ranges[col].range(
+                    None if lo is None else float(lo), None if hi is None else float(hi)))
+        return pos
+
+    def list_feeds(self, limit: int | None = None, **filters) -> pd.DataFrame:
+        # only the returned rows are materialized
+        pos = self.select_positions(**filters)
+        if pos is None:
+            pos = np.arange(len(self.columns))
+        return self.take(pos[:limit])
+
+    def score_positions(self, pos: np.ndarray | None = None, weights: Dict[str, float] | None = None) -> np.ndarray:
+        """Clarity scores at row positions (all rows when None), no frame copies.
+
+        weights are per call, the store holds no ranking state, so concurrent
+        requests with different weights cannot see each other's.
+        """
+        return combine_components(self.components(pos), weights)
+
+    def filter_and_rank_feeds(self, top_k: int | None = None, weights: Dict[str, float] | None = None,
+                              **filters) -> pd.DataFrame:
+        # top_k=None keeps the full sort, otherwise only the winners are sorted
+        pos = self.select_positions(**filters)
+        if pos is None:
+            pos = np.arange(len(self.columns))
+        return self.rank_positions(pos, self.score_positions(pos, weights), top_k)
+
+    def rank_positions(self, pos: np.ndarray, scores: np.ndarray, top_k: int | None = None) -> pd.DataFrame:
+        """Top rows of pos by precomputed scores (aligned with pos), ties by FEED_ID."""
+        order = top_k_order(scores, self.indexes.ids[pos], top_k)
+        df = self.take(pos[order])
+        df["clarity_score"] = scores[order]
+        return df
+
+    def grouped_top_k(self, by: str = "THEATER", top_k: int = 5, weights: Dict[str, float] | None = None,
+                      **filters) -> pd.DataFrame:
+        """Top top_k rows by clarity within each value of column `by`, from one scoring pass.
+
+        Rows come grouped (groups in name order), best first within a group,
+        ties by FEED_ID; rows with no `by` value are left out. Values that
+        differ only in case are one group, as in CategoryIndex; its
+        upper-cased key is in column `group`. Rows are
+        bucketed by group in one linear pass, each bucket keeps its top_k by
+        partial selection and only those winners are sorted, so the cost
+        stays linear in rows as the number of groups grows.
+        """
+        if not self.columns.has(by):
+            raise ValueError(f"unknown group column {by!r}")
+        pos = self.select_positions(**filters)
+        if pos is None:
+            pos = np.arange(len(self.columns))
+        scores = np.nan_to_num(self.score_positions(pos, weights), nan=-np.inf)
+        c = self.columns.columns[by]
+        if c.kind == "dict":
+            codes, cats = c.data[pos].astype(np.intp), np.asarray(c.categories, dtype=object)
+        else:
+            codes, cats = pd.factorize(self.columns.strings(by, pos))
+            cats = np.asarray(cats, dtype=object)
+        # category -> group code in key order, case folded; missing (-1) stays out
+        keys, rank = np.unique([str(v).upper() for v in cats], return_inverse=True)
+        keep = codes >= 0
+        pos, scores, group = pos[keep], scores[keep], rank.reshape(-1)[codes[keep]]
+        id_rank = self.indexes.id_index.ranks()[pos]
+        if len(keys) <= GROUP_BUCKETS_MAX:
+            cand = self._group_candidates(group, scores, id_rank, len(keys), top_k)
+        else:
+            cand = np.arange(len(pos))
+        order = cand[np.lexsort((id_rank[cand], -scores[cand], group[cand]))]
+        g = group[order]
+        # position of each row within its group, from the first row of each group run
+        starts = np.flatnonzero(np.r_[True, g[1:] != g[:-1]])
+        nth = np.arange(len(g)) - np.repeat(starts, np.diff(np.r_[starts, len(g)]))
+        order = order[nth < top_k]
+        df = self.take(pos[order])
+        df["clarity_score"] = scores[order]
+        df["group"] = keys.astype(object)[group[order]]
         return df
 
-    def clarity_score(self, row) -> float:
-        return clarity_score_from_row(row, self.feeds_df, self.ranking_weights or None)
+    @staticmethod
+    def _group_candidates(group: np.ndarray, scores: np.ndarray, id_rank: np.ndarray, n_groups: int,
+                          top_k: int) -> np.ndarray:
+        """Indices of each group's top_k rows (ties at the cut settled by id), unordered."""
+        # a stable sort on small group codes is a radix pass, it buckets rows by group
+        by_group = np.argsort(group.astype(np.int16 if n_groups < 2**15 else np.int64), kind="stable")
+        bounds = np.searchsorted(group[by_group], np.arange(n_groups + 1))
+        cand = []
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            seg = by_group[lo:hi]
+            if len(seg) > top_k:
+                if top_k <= 0:
+                    continue
+                seg_scores = scores[seg]
+                kth = -np.partition(-seg_scores, top_k - 1)[top_k - 1]
+                above, tied = seg[seg_scores > kth], seg[seg_scores == kth]
+                need = top_k - len(above)
+                if len(tied) > need:
+                    tied = tied[np.argpartition(id_rank[tied], need - 1)[:need]]
+                seg = np.concatenate([above, tied])
+            cand.append(seg)
+        return np.concatenate(cand) if cand else np.empty(0, dtype=np.intp)
+
+    def pareto_feeds(self, limit: int | None = None, **filters) -> pd.DataFrame:
+        """Feeds no other selected feed beats on every axis: RES area, FRRATE and codec
+        efficiency (higher is better) and LAT_MS (lower is better).
+
+        The frontier replaces a sweep of weighted rankings. Rows come best
+        area first, then fps, codec efficiency, latency and FEED_ID; missing
+        numbers count as the worst value. Adds codec_efficiency.
+        """
+        pos = self.select_positions(**filters)
+        if pos is None:
+            pos = np.arange(len(self.columns))
+        cols = self.columns
 
-    def filter_and_rank_feeds(self, **filters) -> pd.DataFrame:
-        df = self.list_feeds(**filters).copy()
-        df["clarity_score"] = df.apply(self.clarity_score, axis=1)
-        df = df.sort_values("clarity_score", ascending=False)
+        def num(c, missing):
+            return np.nan_to_num(cols.numeric(c, pos), nan=missing) if cols.has(c) else np.full(len(pos), missing)
+
+        area = num("RES_W", 0.0) * num("RES_H", 0.0)
+        fps, lat, codec = num("FRRATE", 0.0), num("LAT_MS", np.inf), self._codec_bonus(pos)
+        on = skyline_mask(np.column_stack([area, fps, codec, -lat]))
+        order = np.lexsort((self.indexes.ids[pos][on], lat[on], -codec[on], -fps[on], -area[on]))[:limit]
+        df = self.take(pos[on][order])
+        df["codec_efficiency"] = codec[on][order]
         return df
 
+    def check_constraints(self, pos: np.ndarray | None = None, rules: List[Rule] | None = None,
+                          decoder: Dict[str, Any] | None = None) -> List[RuleHits]:
+        """Constraint violations at sorted row positions (all rows when None), grouped by rule.
+
+        Every rule is one column-wise mask over the selection. rules default
+        to constraint_rules, decoder to the loaded decoder params.
+        """
+        if pos is None:
+            pos = np.arange(len(self.columns))
+        if rules is None:
+            rules = self.constraint_rules
+        if decoder is None:
+            decoder = self.decoder_params.model_dump()
+        return evaluate(self.columns, pos, rules, decoder)
+
+    def compatibility(self) -> CompatibilityMatrix:
+        """Feeds x decoder profiles playability, built once per data_version."""
+        m = self._compat
+        if m is None or m.data_version != self.data_version:
+            m = self._compat = CompatibilityMatrix.build(self.columns, self.decoder_profiles, self.constraint_rules,
+                                                         self.blocking_rules, self.data_version)
+        return m
+
+    def encoder_match(self) -> EncoderMatch:
+        """Every feed scored against the encoder params, aggregated by THEATER and CODEC.
+
+        Built once per data_version; a reload after encoder_params.json
+        changes (or any feed edit) starts a new version.
+        """
+        m = self._encoder_match
+        if m is None or m.data_version != self.data_version:
+            m = self._encoder_match = EncoderMatch.build(self.columns, self.encoder_params, self.data_version)
+        return m
+
     def get_encoder_params(self) -> EncoderParams:
         return self.encoder_params
 
@@ -46,6 +46,7 @@ class DecoderParams(BaseModel):
     dpb_size: Optional[int] = None
     reorder_frames: Optional[bool] = None
     jitter_buf_ms: Optional[int] = None
+    max_output_latency_ms: Optional[int] = None
     av_sync: Optional[str] = None
     output_format: Optional[str] = None
     deinterlace: Optional[str] = None
@@ -0,0 +1,160 @@
+from __future__ import annotations
+from typing import Dict, Any, List, Optional, Tuple
+import hashlib, json, os, shutil, uuid
+from contextlib import contextmanager
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows, no cross-process lock
+    fcntl = None
+
+# Snapshot layout under the cache dir:
+#   CURRENT          name of the live snapshot dir, swapped with os.replace
+#   <key>/meta.json  source stamps + whatever metadata the store saves
+#   <key>/<name>.npy one file per array, plain np.save so it can be mmapped
+# <key> is a hash of the source file contents.
+
+CURRENT = "CURRENT"
+META = "meta.json"
+FORMAT_VERSION = 2
+
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def source_stamps(paths: List[str], known: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Dict[str, Any]]:
+    """size, mtime_ns and sha256 per source file.
+
+    Hashes are reused from `known` when size and mtime are unchanged, so an
+    untouched tree is stamped without reading any file.
+    """
+    out: Dict[str, Dict[str, Any]] = {}
+    for p in paths:
+        st = os.stat(p)
+        name = os.path.basename(p)
+        prev = (known or {}).get(name)
+        if prev and prev["size"] == st.st_size and prev["mtime_ns"] == st.st_mtime_ns:
+            sha = prev["sha256"]
+        else:
+            sha = file_sha256(p)
+        out[name] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": sha}
+    return out
+
+
+def snapshot_key(stamps: Dict[str, Dict[str, Any]]) -> str:
+    h = hashlib.sha256(str(FORMAT_VERSION).encode())
+    for name in sorted(stamps):
+        h.update(f"{name}:{stamps[name]['sha256']}\n".encode())
+    return h.hexdigest()[:24]
+
+
+@contextmanager
+def snapshot_lock(cache_dir: str):
+    """Exclusive cross-process lock on the cache dir, so only one process builds."""
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(os.path.join(cache_dir, ".lock"), "w") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def current_dir(cache_dir: str) -> Optional[str]:
+    try:
+        with open(os.path.join(cache_dir, CURRENT)) as f:
+            name = f.read().strip()
+    except OSError:
+        return None
+    path = os.path.join(cache_dir, name)
+    return path if name and os.path.isfile(os.path.join(path, META)) else None
+
+
+def read_snapshot(cache_dir: str, paths: List[str], mmap: bool = False
+                  ) -> Optional[Tuple[Dict[str, Any], Dict[str, np.ndarray]]]:
+    """(meta, arrays) of the live snapshot if it matches the sources, else None.
+
+    With mmap=True arrays are mapped read-only instead of read into memory.
+    """
+    path = current_dir(cache_dir)
+    if path is None:
+        return None
+    with open(os.path.join(path, META)) as f:
+        meta = json.load(f)
+    if meta.get("format") != FORMAT_VERSION:
+        return None
+    stamps = source_stamps(paths, meta.get("sources"))
+    if snapshot_key(stamps) != meta.get("key"):
+        return None
+    if stamps != meta.get("sources"):
+        # touched but unchanged sources, remember the new mtimes so we skip rehashing
+        try:
+            _write_meta(path, {**meta, "sources": stamps})
+        except OSError:
+            pass
+    mode = "r" if mmap else None
+    arrays = {name: np.load(os.path.join(path, name + ".npy"), mmap_mode=mode, allow_pickle=False)
+              for name in meta["arrays"]}
+    return meta, arrays
+
+
+def write_snapshot(cache_dir: str, paths: List[str], stamps: Dict[str, Dict[str, Any]],
+                   meta: Dict[str, Any], arrays: Dict[str, np.ndarray]) -> Optional[str]:
+    """Write a snapshot of sources stamped `stamps` and make it live. Returns its dir.
+
+    `stamps` must be taken before the sources were read. When a source has
+    changed since, the arrays may hold the old rows under the new file's key,
+    so nothing is written and None is returned.
+    """
+    if source_stamps(paths, stamps) != stamps:
+        return None
+    os.makedirs(cache_dir, exist_ok=True)
+    key = snapshot_key(stamps)
+    final = os.path.join(cache_dir, key)
+    meta = {**meta, "format": FORMAT_VERSION, "key": key, "sources": stamps, "arrays": sorted(arrays)}
+
+    if not os.path.isfile(os.path.join(final, META)):
+        tmp = os.path.join(cache_dir, f".tmp-{uuid.uuid4().hex}")
+        os.makedirs(tmp)
+        for name, arr in arrays.items():
+            np.save(os.path.join(tmp, name + ".npy"), np.ascontiguousarray(arr), allow_pickle=False)
+        _write_meta(tmp, meta)
+        try:
+            os.rename(tmp, final)
+        except OSError:
+            # another process published the same key first
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    _publish(cache_dir, key)
+    _prune(cache_dir, keep=key)
+    return final
+
+
+def _write_meta(path: str, meta: Dict[str, Any]) -> None:
+    tmp = os.path.join(path, f".{META}-{uuid.uuid4().hex}")
+    with open(tmp, "w") as f:
+        json.dump(meta, f)
+    os.replace(tmp, os.path.join(path, META))
+
+
+def _publish(cache_dir: str, key: str) -> None:
+    tmp = os.path.join(cache_dir, f".{CURRENT}-{uuid.uuid4().hex}")
+    with open(tmp, "w") as f:
+        f.write(key)
+    os.replace(tmp, os.path.join(cache_dir, CURRENT))
+
+
+def _prune(cache_dir: str, keep: str) -> None:
+    # readers that already mapped an old snapshot keep working after unlink
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        if name != keep and not name.startswith(".") and os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
@@ -0,0 +1,163 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Any, Optional, Tuple
+import numpy as np
+import pandas as pd
+from .columnar import FeedColumns
+
+
+def _col(cols: FeedColumns, name: str, pos: Optional[np.ndarray] = None) -> np.ndarray:
+    if not cols.has(name):
+        return np.zeros(len(cols) if pos is None else len(pos), dtype=float)
+    return np.nan_to_num(cols.numeric(name, pos), nan=0.0)
+
+
+def stat_rows(cols: FeedColumns, pos: np.ndarray) -> pd.DataFrame:
+    """The per-row inputs of the stats at positions pos."""
+    w, h, fps = _col(cols, "RES_W", pos), _col(cols, "RES_H", pos), _col(cols, "FRRATE", pos)
+    none = np.full(len(pos), None, dtype=object)
+    return pd.DataFrame({
+        "THEATER": cols.strings("THEATER", pos) if cols.has("THEATER") else none,
+        "CODEC": cols.strings("CODEC", pos) if cols.has("CODEC") else none,
+        "w": w, "h": h, "fps": fps, "area": w * h,
+    })
+
+
+def _max(a: np.ndarray) -> float:
+    return float(a.max()) if len(a) else 0.0
+
+
+def _min(a: np.ndarray) -> float:
+    return float(a.min()) if len(a) else 0.0
+
+
+# stat -> (row input, reducer) for the extremes kept table-wide and per theater
+_TABLE_EXTREMES = {"max_area": ("area", _max), "min_area": ("area", _min), "max_fps": ("fps", _max),
+                   "max_res_w": ("w", _max), "max_res_h": ("h", _max)}
+_THEATER_EXTREMES = {"max_area": ("area", _max), "min_area": ("area", _min), "max_fps": ("fps", _max)}
+
+
+def _extremes(cols: FeedColumns) -> Dict[str, float]:
+    w, h, fps = _col(cols, "RES_W"), _col(cols, "RES_H"), _col(cols, "FRRATE")
+    area = w * h
+    return {"max_area": _max(area), "min_area": _min(area), "max_fps": _max(fps),
+            "max_res_w": _max(w), "max_res_h": _max(h)}
+
+
+def _holds_extreme(current: Dict[str, Any], removed: pd.DataFrame, extremes: Dict[str, Any]) -> bool:
+    # removing a row that holds a max or min means rescanning for the next one
+    return len(removed) > 0 and any(current[key] in removed[col].to_numpy() for key, (col, _) in extremes.items())
+
+
+def _theater_entry(rows: pd.DataFrame) -> Dict[str, float]:
+    return {"count": len(rows), "max_area": float(rows["area"].max()), "min_area": float(rows["area"].min()),
+            "max_fps": float(rows["fps"].max()), "mean_fps": float(rows["fps"].mean())}
+
+
+@dataclass
+class FeedStats:
+    """Table-wide aggregates computed once per load of the feeds table, patched on upserts and deletes."""
+    rows: int = 0
+    max_area: float = 0.0
+    min_area: float = 0.0
+    max_fps: float = 0.0
+    max_res_w: float = 0.0
+    max_res_h: float = 0.0
+    codec_counts: Dict[str, int] = field(default_factory=dict)
+    # theater -> {count, max_area, min_area, max_fps, mean_fps}
+    theaters: Dict[str, Dict[str, float]] = field(default_factory=dict)
+
+    @classmethod
+    def from_columns(cls, cols: FeedColumns) -> "FeedStats":
+        w, h, fps = _col(cols, "RES_W"), _col(cols, "RES_H"), _col(cols, "FRRATE")
+        area = w * h
+        codec_counts: Dict[str, int] = {}
+        if cols.has("CODEC"):
+            codec_counts = {str(k): int(v) for k, v in
+                            pd.Series(cols.strings("CODEC")).value_counts().items()}
+
+        theaters: Dict[str, Dict[str, float]] = {}
+        if cols.has("THEATER") and len(cols):
+            g = pd.DataFrame({"THEATER": cols.strings("THEATER"), "area": area, "fps": fps}).groupby("THEATER")
+            agg = g.agg(count=("area", "size"), max_area=("area", "max"), min_area=("area", "min"),
+                        max_fps=("fps", "max"), mean_fps=("fps", "mean"))
+            theaters = {str(t): {k: (int(v) if k == "count" else float(v)) for k, v in r.items()}
+                        for t, r in agg.iterrows()}
+
+        return cls(
+            rows=len(cols),
+            max_area=_max(area),
+            min_area=_min(area),
+            max_fps=_max(fps),
+            max_res_w=_max(w),
+            max_res_h=_max(h),
+            codec_counts=codec_counts,
+            theaters=theaters,
+        )
+
+    def updated(self, cols: FeedColumns, removed: pd.DataFrame, added: pd.DataFrame,
+                theater_pos: Callable[[str], np.ndarray]) -> "FeedStats":
+        """Stats for cols, the table after dropping the `removed` rows and adding the `added` ones.
+
+        removed/added come from stat_rows (an update is both). Counts and sums
+        are patched directly; an extreme is only recomputed, over the table
+        or over one theater's rows (theater_pos), when a removed row held it.
+        """
+        out = FeedStats.from_dict(self.as_dict())
+        out.rows = len(cols)
+
+        for frame, sign in ((removed, -1), (added, 1)):
+            for k, v in frame["CODEC"].dropna().astype(str).value_counts().items():
+                out.codec_counts[k] = out.codec_counts.get(k, 0) + sign * int(v)
+        out.codec_counts = {k: v for k, v in out.codec_counts.items() if v > 0}
+
+        if _holds_extreme(self.as_dict(), removed, _TABLE_EXTREMES):
+            for key, v in _extremes(cols).items():
+                setattr(out, key, v)
+        else:
+            for key, (col, fn) in _TABLE_EXTREMES.items():
+                base = [getattr(self, key)] if self.rows else []
+                setattr(out, key, fn(np.array(base + added[col].tolist())))
+
+        theaters = pd.concat([removed["THEATER"], added["THEATER"]]).dropna().astype(str).unique()
+        for t in theaters:
+            gone = removed[removed["THEATER"] == t]
+            new = added[added["THEATER"] == t]
+            cur = out.theaters.get(t)
+            count = (cur["count"] if cur else 0) - len(gone) + len(new)
+            if count <= 0:
+                out.theaters.pop(t, None)
+            elif cur is not None and _holds_extreme(cur, gone, _THEATER_EXTREMES):
+                rows = stat_rows(cols, theater_pos(t))
+                out.theaters[t] = _theater_entry(rows[rows["THEATER"] == t])
+            else:
+                fps_sum = (cur["count"] * cur["mean_fps"] if cur else 0.0) - gone["fps"].sum() + new["fps"].sum()
+                entry: Dict[str, float] = {"count": count}
+                for key, (col, fn) in _THEATER_EXTREMES.items():
+                    base = [cur[key]] if cur else []
+                    entry[key] = fn(np.array(base + new[col].tolist()))
+                entry["mean_fps"] = float(fps_sum / count)
+                out.theaters[t] = entry
+        out.theaters = dict(sorted(out.theaters.items()))
+        return out
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "FeedStats":
+        return cls(**d)
+
+    def norms(self) -> Tuple[float, float]:
+        """(max_area, max_fps) for score normalization, 1.0 when non-positive."""
+        return (self.max_area if self.max_area > 0 else 1.0,
+                self.max_fps if self.max_fps > 0 else 1.0)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "rows": self.rows,
+            "max_area": self.max_area,
+            "min_area": self.min_area,
+            "max_fps": self.max_fps,
+            "max_res_w": self.max_res_w,
+            "max_res_h": self.max_res_h,
+            "codec_counts": dict(self.codec_counts),
+            "theaters": {k: dict(v) for k, v in self.theaters.items()},
+        }
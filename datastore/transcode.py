@@ -0,0 +1,108 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Any, Dict, List
+import numpy as np
+import pandas as pd
+from util.ranking import resolve_weights
+from .columnar import FeedColumns, get_bits
+from .models import EncoderParams
+
+# Encoder / feed match: how far each feed is from what the encoder profile
+# emits, and what re-encoding the mismatched ones would cost.
+
+# codec spellings that name the same bitstream format
+CODEC_FAMILY = {"HEVC": "H265", "AVC": "H264"}
+# encoder params carry no output size, bitrate_kbps is taken to be for this one
+REFERENCE_RES = (1920, 1080)
+# frame rates closer than this count as the same rate
+FPS_TOLERANCE = 0.01
+
+
+def codec_family(codec: Any) -> str:
+    c = "" if codec is None else str(codec).upper()
+    return CODEC_FAMILY.get(c, c)
+
+
+@dataclass
+class EncoderMatch:
+    """Match of every feed against one encoder profile, aggregated by THEATER and CODEC.
+
+    Only the aggregates and a packbits row of "needs transcoding" per feed
+    are kept; the per-feed scores are transient.
+    """
+    data_version: int
+    encoder: Dict[str, Any]
+    n: int
+    transcode_bits: np.ndarray
+    theaters: List[Dict[str, Any]]
+    groups: List[Dict[str, Any]]
+
+    @classmethod
+    def build(cls, cols: FeedColumns, enc: EncoderParams, data_version: int) -> "EncoderMatch":
+        n = len(cols)
+
+        def num(name):
+            return np.nan_to_num(cols.numeric(name), nan=0.0) if cols.has(name) else np.zeros(n)
+
+        def text(name):
+            return cols.strings(name) if cols.has(name) else np.full(n, None, dtype=object)
+
+        w, h, fps = num("RES_W"), num("RES_H"), num("FRRATE")
+        theater, codec = text("THEATER"), text("CODEC")
+        enc_fps = float(enc.framerate or 0)
+        enc_kbps = float(enc.bitrate_kbps or 0)
+
+        # codec mismatch, decided once per distinct codec
+        codes, cats = pd.factorize(codec)
+        same = np.array([codec_family(c) == codec_family(enc.codec) for c in cats] + [False], dtype=bool)
+        codec_ok = same[codes]  # code -1 (missing) picks the trailing False
+        fps_ok = np.abs(fps - enc_fps) <= FPS_TOLERANCE if enc_fps else np.ones(n, dtype=bool)
+        transcode = ~codec_ok | ~fps_ok
+
+        # resolution scaling against the encoder's reference size, 1.0 = same pixel count
+        scale = w * h / float(REFERENCE_RES[0] * REFERENCE_RES[1])
+        res_match = np.zeros(n)
+        sized = scale > 0
+        res_match[sized] = np.minimum(scale[sized], 1.0 / scale[sized])
+        fps_match = (np.minimum(fps, enc_fps) / np.maximum(np.maximum(fps, enc_fps), 1e-9)) if enc_fps else np.ones(n)
+        wts = resolve_weights()
+        match = (wts["resolution"] * res_match + wts["fps"] * fps_match + wts["codec"] * codec_ok) / sum(wts.values())
+
+        # bitrate to re-encode at the encoder's settings: scaled by pixel count,
+        # and by frame rate when the feed delivers fewer frames than the encoder rate
+        fps_factor = np.minimum(fps, enc_fps) / enc_fps if enc_fps else np.ones(n)
+        kbps = np.where(transcode, enc_kbps * scale * fps_factor, 0.0)
+
+        frame = pd.DataFrame({
+            "theater": theater, "codec": codec, "transcode": transcode, "codec_mismatch": ~codec_ok,
+            "fps_mismatch": ~fps_ok, "match": match, "kbps": kbps,
+        })
+        return cls(
+            data_version=data_version,
+            encoder={"codec": enc.codec, "framerate": enc.framerate, "bitrate_kbps": enc.bitrate_kbps,
+                     "reference_res": list(REFERENCE_RES)},
+            n=n,
+            transcode_bits=np.packbits(transcode),
+            theaters=_aggregate(frame, ["theater"]),
+            groups=_aggregate(frame, ["theater", "codec"]),
+        )
+
+    def needs_transcode(self, pos: np.ndarray) -> np.ndarray:
+        return get_bits(self.transcode_bits, pos)
+
+
+def _aggregate(frame: pd.DataFrame, keys: List[str]) -> List[Dict[str, Any]]:
+    if not len(frame):
+        return []
+    agg = frame.groupby(keys, dropna=False, sort=True).agg(
+        feeds=("match", "size"), transcode=("transcode", "sum"), codec_mismatch=("codec_mismatch", "sum"),
+        fps_mismatch=("fps_mismatch", "sum"), mean_match=("match", "mean"), transcode_kbps=("kbps", "sum"),
+    ).reset_index()
+    out = []
+    for r in agg.to_dict(orient="records"):
+        row = {k: (None if pd.isna(r[k]) else str(r[k])) for k in keys}
+        row.update(feeds=int(r["feeds"]), transcode=int(r["transcode"]), codec_mismatch=int(r["codec_mismatch"]),
+                   fps_mismatch=int(r["fps_mismatch"]), mean_match=round(float(r["mean_match"]), 6),
+                   transcode_kbps=round(float(r["transcode_kbps"]), 1))
+        out.append(row)
+    return out
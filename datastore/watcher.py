@@ -0,0 +1,70 @@
+from __future__ import annotations
+from typing import Callable, Dict, List, Optional, Tuple
+import os, threading
+
+Stamps = Dict[str, Optional[Tuple[int, int]]]
+
+
+def file_stamps(paths: List[str]) -> Stamps:
+    """(size, mtime_ns) per path, None for a missing file."""
+    out: Stamps = {}
+    for p in paths:
+        try:
+            st = os.stat(p)
+            out[p] = (st.st_size, st.st_mtime_ns)
+        except OSError:
+            out[p] = None
+    return out
+
+
+class SourceWatcher:
+    """Polls source files and calls on_change from a background thread when they change.
+
+    A change is only reported once the stamps are stable across two polls,
+    so a file that is still being written is not picked up half-way.
+    Exceptions from on_change are printed and the old state is kept; the
+    next change triggers another attempt.
+    """
+
+    def __init__(self, paths: List[str], on_change: Callable[[], None], interval: float = 2.0):
+        self.paths = paths
+        self.on_change = on_change
+        self.interval = interval
+        self.stamps = file_stamps(paths)
+        self._pending: Optional[Stamps] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="source-watcher", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def poll(self) -> bool:
+        """One check, returns True when on_change ran."""
+        now = file_stamps(self.paths)
+        if now == self.stamps:
+            self._pending = None
+            return False
+        if now != self._pending:
+            # changed since the last poll, wait for it to settle
+            self._pending = now
+            return False
+        self._pending = None
+        try:
+            self.on_change()
+        except Exception as e:
+            print("Warning: reload failed, keeping the current data:", e)
+        # either way this version has been handled
+        self.stamps = now
+        return True
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.poll()
@@ -0,0 +1,45 @@
+import os, sys, argparse, time
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import numpy as np
+
+from util.ranking import skyline_mask
+
+FPS = np.array([24.0, 25.0, 29.97, 30.0, 50.0, 59.94, 60.0])
+CODEC = np.array([0.7, 0.9, 1.0])
+
+
+def anti_correlated(rows: int, kind: str, rng) -> np.ndarray:
+    """Columns where gaining on one axis costs on another, so most rows are on the skyline.
+
+    feeds: RES area against LAT_MS (negated, higher is better) on a line with
+    noise, FRRATE and codec efficiency drawn from the few values feeds have.
+    continuous: all four axes continuous on a simplex, every row is on the
+    skyline, the worst case for the divide and conquer.
+    """
+    if kind == "continuous":
+        return rng.dirichlet(np.ones(4), rows)
+    t = rng.random(rows)
+    area = 640 * 480 + t * (7680 * 4320) + rng.normal(0, 1e5, rows)
+    lat = 15 + t * 2000 + rng.normal(0, 20, rows)
+    return np.column_stack([area, rng.choice(FPS, rows), rng.choice(CODEC, rows), -lat])
+
+
+def main():
+    ap = argparse.ArgumentParser(description="skyline_mask on anti-correlated data")
+    ap.add_argument("--rows", type=int, nargs="+", default=[8_000, 32_000, 128_000])
+    ap.add_argument("--kind", choices=["feeds", "continuous"], nargs="+", default=["feeds", "continuous"])
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'kind':<11} {'rows':>8} {'skyline':>8} {'s':>8}")
+    for kind in args.kind:
+        for rows in args.rows:
+            values = anti_correlated(rows, kind, rng)
+            t0 = time.perf_counter()
+            on = skyline_mask(values)
+            print(f"{kind:<11} {rows:>8} {int(on.sum()):>8} {time.perf_counter() - t0:8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import os, sys, argparse, time
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import numpy as np
+
+from app.graph import build_graph, get_ctx, run_direct
+from tools_mcp.questions import classify_intent
+
+QUESTIONS = {
+    "get_encoder": "Show the encoder parameters",
+    "get_decoder": "What are the decoder parameters?",
+    "list_feeds": "List feeds at least 1080p and 30 fps using H265 in EUR",
+    "rank_feeds": "Top 5 feeds with best clarity in PAC",
+    "sanity_check": "Check constraints for the top feeds in PAC",
+}
+
+
+def timings(fn, question: str, n: int) -> np.ndarray:
+    out = np.empty(n)
+    for i in range(n):
+        t0 = time.perf_counter()
+        fn({"question": question})
+        out[i] = time.perf_counter() - t0
+    return out * 1e6
+
+
+def main():
+    ap = argparse.ArgumentParser(description="/query latency: LangGraph graph vs direct dispatch")
+    ap.add_argument("-n", type=int, default=2000, help="calls per question and mode")
+    args = ap.parse_args()
+
+    graph = build_graph()
+    get_ctx()
+    print(f"{'intent':<14} {'mode':<7} {'p50 us':>9} {'p99 us':>9}")
+    for intent, q in QUESTIONS.items():
+        assert classify_intent(q) == intent, (q, classify_intent(q))
+        a, b = graph.invoke({"question": q}), run_direct({"question": q})
+        if (a["answer"], a.get("evidence")) != (b["answer"], b.get("evidence")):
+            raise SystemExit(f"graph and direct answers differ for {q!r}")
+        for mode, fn in (("graph", graph.invoke), ("direct", run_direct)):
+            fn({"question": q})  # warm up
+            t = timings(fn, q, args.n)
+            print(f"{intent:<14} {mode:<7} {np.percentile(t, 50):9.1f} {np.percentile(t, 99):9.1f}")
+
+
+if __name__ == "__main__":
+    main()
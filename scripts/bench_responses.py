@@ -0,0 +1,45 @@
+import os, sys, argparse, time
+from types import SimpleNamespace
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from datastore.loader import DataStore
+from scripts.synthetic import synthetic_feeds
+from tools_mcp.tools import _list_feeds, _filter_and_rank_feeds, summarize_selection
+from tools_mcp.schemas import ListFeedsRequest, FilterAndRankRequest, SummarizeSelectionRequest
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - t0
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Bulk tool responses: build and JSON time, response size")
+    ap.add_argument("--data-dir", default=".")
+    ap.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    args = ap.parse_args()
+
+    base = DataStore(args.data_dir, use_snapshot=False)
+    base.load_all()
+    print(f"{'rows':>8} {'tool':<20} {'build s':>8} {'json s':>8} {'us/row':>7} {'bytes':>12}")
+    for rows in args.rows:
+        store = DataStore(args.data_dir, use_snapshot=False)
+        store.load_all()
+        store.feeds_df = synthetic_feeds(base.feeds_df, rows)
+        ctx = SimpleNamespace(store=store)  # summarize_selection only reads ctx.store
+        ids = store.feeds_df["FEED_ID"].tolist()
+        tools = {
+            "list_feeds": lambda: _list_feeds(store, ListFeedsRequest(limit=rows)),
+            "filter_and_rank": lambda: _filter_and_rank_feeds(store, FilterAndRankRequest(top_k=rows)),
+            "summarize_selection": lambda: summarize_selection(ctx, SummarizeSelectionRequest(feed_ids=ids)),
+        }
+        for name, fn in tools.items():
+            res, build = timed(fn)
+            body, dump = timed(res.model_dump_json)
+            per_row = (build + dump) / rows * 1e6
+            print(f"{rows:>8} {name:<20} {build:8.3f} {dump:8.3f} {per_row:7.2f} {len(body):>12,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+import os, sys, time, argparse, resource
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from datastore.loader import DataStore
+from datastore.ingest import DEFAULT_CHUNKSIZE, print_progress
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Chunked feed ingestion with per-chunk progress")
+    ap.add_argument("--data-dir", default=".")
+    ap.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    store = DataStore(args.data_dir, use_snapshot=False, chunksize=args.chunksize, progress=print_progress)
+    store.load_all()
+    elapsed = time.perf_counter() - t0
+    rows = len(store.columns)
+    # ru_maxrss is KiB on Linux
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"Loaded {rows:,} rows in {elapsed:.2f}s ({rows / elapsed:,.0f} rows/s), "
+          f"store {store.columns.nbytes() / 1e6:.1f} MB, peak RSS {peak_mb:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+import os, sys, asyncio
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from app.limiter import ConcurrencyLimiter, Overloaded
+
+
+async def burst(limiter: ConcurrencyLimiter, jobs: int, hold_s: float) -> dict:
+    """jobs requests arriving at once from idle, each holding its slot for hold_s."""
+    out = {"ok": 0, "shed": 0, "timed_out": 0}
+
+    async def one():
+        try:
+            async with limiter.slot():
+                await asyncio.sleep(hold_s)
+            out["ok"] += 1
+        except Overloaded as e:
+            out["timed_out" if "no slot" in str(e) else "shed"] += 1
+
+    await asyncio.gather(*(one() for _ in range(jobs)))
+    return out
+
+
+def main():
+    # 2 run, 1 waits, the other 5 are shed at once; the waiter gets a slot in time
+    limiter = ConcurrencyLimiter(max_inflight=2, max_waiting=1, queue_timeout=1.0)
+    res = asyncio.run(burst(limiter, jobs=8, hold_s=0.05))
+    print("burst of 8, 2 inflight + 1 waiting:", res)
+    assert res == {"ok": 3, "shed": 5, "timed_out": 0}, res
+    assert limiter.inflight == 0 and limiter.waiting == 0 and limiter.rejected == 5
+
+    # a waiter that outlives queue_timeout is rejected, not left queued
+    limiter = ConcurrencyLimiter(max_inflight=1, max_waiting=4, queue_timeout=0.05)
+    res = asyncio.run(burst(limiter, jobs=3, hold_s=0.2))
+    print("slow holder, short queue timeout:", res)
+    assert res == {"ok": 1, "shed": 0, "timed_out": 2}, res
+    print("limiter checks passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+import os, sys, argparse
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from datastore.loader import DataStore
+from scripts.synthetic import synthetic_feeds
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Bytes per feed: pandas frame vs columnar store")
+    ap.add_argument("--data-dir", default=".")
+    ap.add_argument("--rows", type=int, default=0, help="scale the table to this many synthetic rows")
+    args = ap.parse_args()
+
+    store = DataStore(args.data_dir)
+    store.load_all()
+    if args.rows:
+        store.feeds_df = synthetic_feeds(store.feeds_df, args.rows)
+
+    rep = store.memory_report()
+    print(f"Rows: {rep['rows']}")
+    print(f"pandas frame:   {rep['frame_bytes']:>12,} bytes  {rep['frame_bytes_per_feed']:8.1f} bytes/feed")
+    print(f"columnar store: {rep['columnar_bytes']:>12,} bytes  {rep['columnar_bytes_per_feed']:8.1f} bytes/feed")
+    print()
+    for name, c in rep["columns"].items():
+        print(f"  {name:<10} {c['kind']:<6} {c['dtype']:<6} {c['bytes']:>12,}")
+
+
+if __name__ == "__main__":
+    main()
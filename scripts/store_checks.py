@@ -0,0 +1,231 @@
+import os, sys, shutil, tempfile
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import numpy as np
+import pandas as pd
+
+from datastore.loader import DataStore, SOURCE_FILES, CONFIG_FILES
+from datastore.snapshot import read_snapshot
+from util.ranking import skyline_mask
+from tools_mcp.tools import ToolContext, list_feeds, upsert_feeds
+from tools_mcp.schemas import ListFeedsRequest, UpsertFeedsRequest
+
+# Consistency checks for the derived state the store keeps: incremental
+# indexes and stats, snapshots, the result cache, the compatibility bitmap,
+# the skyline and grouped top-k, each against a from-scratch answer.
+
+DATA_DIR = "."
+THEATERS = ["PAC", "CONUS", "EUR", "ME", "AFR", "ARC", "pac", "Eur"]
+CODECS = ["H265", "HEVC", "H264", "AV1", "VP9", "MPEG2", "h264", None]
+
+
+def fresh_store(rows: pd.DataFrame) -> DataStore:
+    """A store built from scratch on rows, nothing patched incrementally."""
+    store = DataStore(DATA_DIR, use_snapshot=False)
+    store.load_all()
+    store.feeds_df = rows.reset_index(drop=True)
+    return store
+
+
+def all_rows(store: DataStore) -> pd.DataFrame:
+    return store.take(np.arange(len(store.columns)))
+
+
+def check_indexes_equal(a: DataStore, b: DataStore) -> None:
+    ia, ib = a.indexes, b.indexes
+    assert ia.ids.astype(str).tolist() == ib.ids.astype(str).tolist(), "ids"
+    assert np.array_equal(ia.id_index.ranks(), ib.id_index.ranks()), "id order"
+    for name in ("theater", "codec"):
+        pa = {k: v.tolist() for k, v in getattr(ia, name).postings.items() if len(v)}
+        pb = {k: v.tolist() for k, v in getattr(ib, name).postings.items() if len(v)}
+        assert pa == pb, f"{name} postings differ"
+    assert set(ia.ranges) == set(ib.ranges), "range columns"
+    for col in ia.ranges:
+        ra, rb = ia.ranges[col], ib.ranges[col]
+        assert np.array_equal(ra.sorted_values.astype(float), rb.sorted_values.astype(float)), f"{col} values"
+        # rows with equal values may sit in either order
+        pairs = [sorted(zip(r.sorted_values.astype(float).tolist(), r.order.tolist())) for r in (ra, rb)]
+        assert pairs[0] == pairs[1], f"{col} positions"
+
+
+def check_stats_equal(a: DataStore, b: DataStore) -> None:
+    sa, sb = a.stats.as_dict(), b.stats.as_dict()
+    sa["codec_counts"] = {k: v for k, v in sa["codec_counts"].items() if v}
+    sb["codec_counts"] = {k: v for k, v in sb["codec_counts"].items() if v}
+    assert sa.keys() == sb.keys()
+    for k in sa:
+        if k == "theaters":
+            assert sa[k].keys() == sb[k].keys(), (sorted(sa[k]), sorted(sb[k]))
+            for t in sa[k]:
+                for f, v in sa[k][t].items():
+                    assert np.isclose(v, sb[k][t][f], equal_nan=True), (t, f, v, sb[k][t][f])
+        elif isinstance(sa[k], float):
+            assert np.isclose(sa[k], sb[k], equal_nan=True), (k, sa[k], sb[k])
+        else:
+            assert sa[k] == sb[k], (k, sa[k], sb[k])
+
+
+def random_feed(rng, feed_id: str, partial: bool) -> dict:
+    row = {
+        "FEED_ID": feed_id,
+        "THEATER": THEATERS[rng.integers(len(THEATERS))],
+        "CODEC": CODECS[rng.integers(len(CODECS))],
+        "RES_W": int(rng.choice([640, 1280, 1920, 3840, 7680])),
+        "RES_H": int(rng.choice([480, 720, 1080, 2160, 4320])),
+        "FRRATE": float(rng.choice([23.976, 25.0, 30.0, 59.94, 60.0, 120.0])),
+        "LAT_MS": int(rng.integers(15, 2200)),
+    }
+    if partial:
+        # an update names only some fields, the rest keep their value
+        keep = ["FEED_ID"] + [k for k in row if k != "FEED_ID" and rng.random() < 0.4]
+        row = {k: row[k] for k in keep}
+    return row
+
+
+def check_upsert_delete(steps: int = 40, seed: int = 0) -> None:
+    rng = np.random.default_rng(seed)
+    store = DataStore(DATA_DIR, use_snapshot=False)
+    store.load_all()
+    new_id = 0
+    for step in range(steps):
+        ids = store.indexes.ids.astype(str)
+        op = rng.integers(3)
+        if op == 0 and len(ids):
+            gone = rng.choice(ids, size=min(len(ids), int(rng.integers(1, 6))), replace=False).tolist()
+            store.delete_feeds(gone + ["FD-NOSUCH"])
+        else:
+            feeds = []
+            for _ in range(int(rng.integers(1, 6))):
+                if op == 1 and len(ids):
+                    feeds.append(random_feed(rng, str(rng.choice(ids)), partial=True))
+                else:
+                    new_id += 1
+                    feeds.append(random_feed(rng, f"FD-T{new_id:05d}", partial=False))
+            # one batch updates each id at most once
+            feeds = list({f["FEED_ID"]: f for f in feeds}.values())
+            store.upsert_feeds(feeds)
+        fresh = fresh_store(all_rows(store))
+        check_indexes_equal(store, fresh)
+        check_stats_equal(store, fresh)
+    print(f"Indexes and stats match a rebuild after {steps} random upserts/deletes ({len(store.columns)} rows)")
+
+
+def brute_skyline(values: np.ndarray) -> np.ndarray:
+    v = np.asarray(values, dtype=float)
+    ge = (v[None, :, :] >= v[:, None, :]).all(axis=2)
+    gt = (v[None, :, :] > v[:, None, :]).any(axis=2)
+    return ~(ge & gt).any(axis=1)
+
+
+def check_skyline(trials: int = 500, seed: int = 0) -> None:
+    rng = np.random.default_rng(seed)
+    for t in range(trials):
+        n, d = int(rng.integers(0, 300)), int(rng.integers(1, 6))
+        if t % 3 == 0:
+            values = rng.random((n, d))
+        elif t % 3 == 1:
+            values = rng.integers(0, int(rng.integers(1, 6)), (n, d)).astype(float)  # many ties
+        else:
+            values = rng.dirichlet(np.ones(d), n) if n else np.empty((0, d))  # all on the frontier
+        if t % 7 == 0 and n:
+            values[:, 0] = 1.0
+        assert np.array_equal(skyline_mask(values), brute_skyline(values)), (t, n, d)
+    print(f"skyline_mask matches brute force dominance on {trials} random inputs")
+
+
+def check_grouped_top_k(k_values=(0, 1, 3, 50)) -> None:
+    store = DataStore(DATA_DIR, use_snapshot=False)
+    store.load_all()
+    store.upsert_feeds([random_feed(np.random.default_rng(i), f"FD-G{i:05d}", partial=False) for i in range(40)])
+    ranked = store.filter_and_rank_feeds(top_k=None)
+    for by in ("THEATER", "CODEC", "MODL_TAG"):
+        for k in k_values:
+            got = store.grouped_top_k(by, k)
+            key = ranked[by].map(lambda v: None if pd.isna(v) else str(v).upper())
+            want = ranked.assign(group=key).dropna(subset=["group"])
+            want = want.sort_values("group", kind="stable").groupby("group", sort=False).head(k)
+            assert got["FEED_ID"].tolist() == want["FEED_ID"].tolist(), (by, k)
+            assert np.allclose(got["clarity_score"], want["clarity_score"]), (by, k)
+    # per theater it is the same as one filter_and_rank call per theater
+    got = store.grouped_top_k("THEATER", 5)
+    for t, rows in got.groupby("group", sort=False):
+        want = store.filter_and_rank_feeds(top_k=5, theater=t)
+        assert rows["FEED_ID"].tolist() == want["FEED_ID"].tolist(), t
+    print("grouped_top_k matches filter_and_rank_feeds per group")
+
+
+def check_snapshot() -> None:
+    tmp = tempfile.mkdtemp(prefix="canyon-check-")
+    try:
+        for name in SOURCE_FILES + CONFIG_FILES:
+            if os.path.exists(os.path.join(DATA_DIR, name)):
+                shutil.copy(os.path.join(DATA_DIR, name), tmp)
+        built = DataStore(tmp)
+        built.load_all()
+        paths = built.source_paths()
+        assert read_snapshot(built.cache_dir, paths) is not None, "snapshot not written"
+        loaded = DataStore(tmp)
+        loaded.load_all()
+        assert all_rows(loaded).equals(all_rows(built)), "snapshot rows differ"
+        check_indexes_equal(loaded, built)
+        check_stats_equal(loaded, built)
+
+        feeds = os.path.join(tmp, "Table_feeds_v2.csv")
+        with open(feeds) as f:
+            last = f.read().splitlines()[-1]
+        with open(feeds, "a") as f:
+            f.write("FD-STALE1" + last[last.index(","):] + "\n")
+        assert read_snapshot(built.cache_dir, paths) is None, "changed source still matches the snapshot"
+        reloaded = DataStore(tmp)
+        reloaded.load_all()
+        assert len(reloaded.columns) == len(built.columns) + 1
+        assert len(reloaded.indexes.positions_for_ids(["FD-STALE1"])) == 1
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    print("Snapshot reload equals the build, a changed source makes it stale")
+
+
+def check_cache() -> None:
+    ctx = ToolContext(data_dir=DATA_DIR, watch=False)
+    req = ListFeedsRequest(theater="PAC", limit=500)
+    first = list_feeds(ctx, req)
+    hits = ctx.cache.hits
+    assert list_feeds(ctx, req) is first and ctx.cache.hits == hits + 1, "repeat call missed the cache"
+    version = ctx.store.data_version
+    upsert_feeds(ctx, UpsertFeedsRequest(feeds=[{"FEED_ID": "FD-CACHE1", "THEATER": "PAC", "RES_W": 1280,
+                                                 "RES_H": 720, "FRRATE": 30.0, "CODEC": "H264"}]))
+    assert ctx.store.data_version != version
+    misses = ctx.cache.misses
+    after = list_feeds(ctx, req)
+    assert ctx.cache.misses == misses + 1, "data_version bump did not miss"
+    assert "FD-CACHE1" in [f.FEED_ID for f in after.feeds]
+    print("Result cache hits on repeat and misses after a data_version bump")
+
+
+def check_compatibility() -> None:
+    store = DataStore(DATA_DIR, use_snapshot=False)
+    store.load_all()
+    rows = np.arange(len(store.columns))
+    m = store.compatibility()
+    for profile, decoder in store.decoder_profiles.items():
+        blocking = [r for r in store.constraint_rules if r.kind in set(store.blocking_rules)]
+        blocked = np.zeros(len(rows), dtype=bool)
+        for hits in store.check_constraints(rules=blocking, decoder=decoder):
+            blocked[hits.pos] = True
+        assert np.array_equal(m.playable(profile), ~blocked), profile
+        assert np.array_equal(m.playable(profile, rows[::3]), ~blocked[::3]), profile
+    print("Compatibility bitmap matches the blocking rules per profile:", list(store.decoder_profiles))
+
+
+def main():
+    check_upsert_delete()
+    check_skyline()
+    check_grouped_top_k()
+    check_snapshot()
+    check_cache()
+    check_compatibility()
+    print("All store checks passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,16 @@
+import numpy as np
+import pandas as pd
+
+
+def synthetic_feeds(base: pd.DataFrame, rows: int, seed: int = 0) -> pd.DataFrame:
+    """Scale the sample feeds table up to `rows` rows with fresh unique FEED_IDs."""
+    rng = np.random.default_rng(seed)
+    df = base.iloc[rng.integers(0, len(base), rows)].reset_index(drop=True)
+    alphabet = np.array(list("ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"))
+    # base-36 digits of a shuffled counter keep ids unique and FD-XXXXXX shaped
+    n = rng.permutation(rows)
+    digits = [alphabet[(n // 36 ** i) % 36] for i in reversed(range(6))]
+    df["FEED_ID"] = ["FD-" + "".join(d) for d in zip(*digits)]
+    if "LAT_MS" in df.columns:
+        df["LAT_MS"] = rng.integers(15, 2200, rows)
+    return df
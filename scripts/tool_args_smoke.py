@@ -0,0 +1,63 @@
+import os, sys, ast
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from tools_mcp.schemas import FeedFilter, ListFeedsRequest, FilterAndRankRequest, ParetoFeedsRequest, GroupedRankRequest
+from tools_mcp.tools import ToolContext, list_feeds, filter_and_rank_feeds, pareto_feeds, grouped_rank_feeds
+
+MCP_SERVER = os.path.join(os.path.dirname(os.path.dirname(__file__)), "tools_mcp", "mcp_server.py")
+# MCP tool -> request model it builds, every one takes the FeedFilter fields as arguments
+FILTER_TOOLS = {
+    "list_feeds_tool": ListFeedsRequest,
+    "filter_and_rank_tool": FilterAndRankRequest,
+    "grouped_rank_tool": GroupedRankRequest,
+    "pareto_feeds_tool": ParetoFeedsRequest,
+}
+
+
+def tool_args(path: str) -> dict:
+    """tool name -> {argument: default source} read from the MCP server source.
+
+    Read with ast so the check runs without the mcp package installed.
+    """
+    tree = ast.parse(open(path).read())
+    out = {}
+    for fn in tree.body:
+        if isinstance(fn, (ast.FunctionDef, ast.AsyncFunctionDef)) and fn.name in FILTER_TOOLS:
+            args = fn.args.args
+            defaults = [None] * (len(args) - len(fn.args.defaults)) + fn.args.defaults
+            out[fn.name] = {a.arg: None if d is None else ast.literal_eval(d) for a, d in zip(args, defaults)}
+    return out
+
+
+def main():
+    args = tool_args(MCP_SERVER)
+    assert set(args) == set(FILTER_TOOLS), sorted(set(FILTER_TOOLS) - set(args))
+    for name, model in FILTER_TOOLS.items():
+        # the filter arguments are FeedFilter's fields with its defaults
+        for field, info in FeedFilter.model_fields.items():
+            assert field in args[name], f"{name} is missing filter argument {field}"
+            assert args[name][field] == info.default, (name, field, args[name][field], info.default)
+        # and every tool argument is a field of the request it builds
+        extra = set(args[name]) - set(model.model_fields)
+        assert not extra, f"{name} arguments {sorted(extra)} are not {model.__name__} fields"
+    print("MCP filter tool arguments match FeedFilter:", sorted(FILTER_TOOLS))
+
+    # one call per tool with every filter set
+    ctx = ToolContext(data_dir=".", watch=False)
+    filters = dict(theater="pac", theater_match="exact", min_res_w=1, max_res_w=10**5, min_res_h=1,
+                   max_res_h=10**5, min_fps=1.0, max_fps=240.0, min_lat_ms=0, max_lat_ms=10**6,
+                   codec_in=["H265", "HEVC", "AV1", "H264", "VP9", "MPEG2"])
+    assert set(filters) == set(FeedFilter.model_fields)
+    ranked = filter_and_rank_feeds(ctx, FilterAndRankRequest(**filters, top_k=3)).feeds
+    listed = list_feeds(ctx, ListFeedsRequest(**filters, limit=500)).feeds
+    grouped = grouped_rank_feeds(ctx, GroupedRankRequest(**filters, top_k=3)).groups
+    pareto = pareto_feeds(ctx, ParetoFeedsRequest(**filters)).feeds
+    assert all(f.THEATER.upper() == "PAC" for f in listed)
+    assert [g.group for g in grouped] == (["PAC"] if listed else [])
+    assert [f.FEED_ID for f in grouped[0].feeds] == [f.FEED_ID for f in ranked] if listed else not ranked
+    assert {f.FEED_ID for f in pareto} <= {f.FEED_ID for f in listed}
+    print(f"Filtered calls: {len(listed)} listed, {len(ranked)} ranked, {len(pareto)} on the frontier")
+
+
+if __name__ == "__main__":
+    main()
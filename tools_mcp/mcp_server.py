@@ -1,75 +1,101 @@
 # tools_mcp/mcp_server.py
 from __future__ import annotations
-import json
-from typing import Optional, List, Dict
+from typing import Any, Optional, List, Dict, Literal
 
 from mcp.server.fastmcp import FastMCP
 
 from tools_mcp.tools import (
     ToolContext,
-    get_table_schema,
-    list_feeds,
-    filter_and_rank_feeds,
-    get_encoder_params,
-    get_decoder_params,
-    summarize_selection,
+    alist_feeds,
+    afilter_and_rank_feeds,
+    asummarize_selection,
     explain_term,
-    sanity_check_constraints,
+    asanity_check_constraints,
+    aupsert_feeds,
+    adelete_feeds,
+    adecoder_compatibility,
+    aencoder_match,
+    apareto_feeds,
+    agrouped_rank_feeds,
 )
 
 from tools_mcp.schemas import (
-    GetTableSchemaRequest,
     ListFeedsRequest,
     FilterAndRankRequest,
-    GetEncoderParamsRequest,
-    GetDecoderParamsRequest,
     SummarizeSelectionRequest,
     ExplainTermRequest,
     SanityCheckRequest,
+    UpsertFeedsRequest,
+    DeleteFeedsRequest,
+    DecoderCompatibilityRequest,
+    EncoderMatchRequest,
+    ParetoFeedsRequest,
+    GroupedRankRequest,
 )
 
+from tools_mcp.questions import answer_batch
+
 mcp = FastMCP("canyoncode-tools")
 ctx = ToolContext(data_dir=".")
 
 
 def _dump(model) -> dict:
-    # Most tool returns are pydantic models
-    return json.loads(model.model_dump_json()) if hasattr(model, "model_dump_json") else model
+    # Most tool returns are pydantic models, dumped straight to JSON-ready dicts
+    return model.model_dump(mode="json") if hasattr(model, "model_dump") else model
 
 
 @mcp.tool()
 def get_table_schema_tool() -> dict:
     """Return the camera table schema."""
-    return _dump(get_table_schema(ctx, GetTableSchemaRequest()))
+    # built once per data version, see ToolContext.static
+    return ctx.static().dicts["table_schema"]
 
 
 @mcp.tool()
-def list_feeds_tool(
+async def list_feeds_tool(
     theater: Optional[str] = None,
+    theater_match: Literal["exact", "contains"] = "exact",
     min_res_w: Optional[int] = None,
+    max_res_w: Optional[int] = None,
     min_res_h: Optional[int] = None,
+    max_res_h: Optional[int] = None,
     min_fps: Optional[float] = None,
+    max_fps: Optional[float] = None,
+    min_lat_ms: Optional[int] = None,
+    max_lat_ms: Optional[int] = None,
     codec_in: Optional[List[str]] = None,
     limit: int = 10,
 ) -> dict:
     """List feeds with optional filters."""
     req = ListFeedsRequest(
         theater=theater,
+        theater_match=theater_match,
         min_res_w=min_res_w,
+        max_res_w=max_res_w,
         min_res_h=min_res_h,
+        max_res_h=max_res_h,
         min_fps=min_fps,
+        max_fps=max_fps,
+        min_lat_ms=min_lat_ms,
+        max_lat_ms=max_lat_ms,
         codec_in=codec_in,
         limit=limit,
     )
-    return _dump(list_feeds(ctx, req))
+    return _dump(await alist_feeds(ctx, req))
 
 
 @mcp.tool()
-def filter_and_rank_tool(
+async def filter_and_rank_tool(
     theater: Optional[str] = None,
+    theater_match: Literal["exact", "contains"] = "exact",
     min_res_w: Optional[int] = None,
+    max_res_w: Optional[int] = None,
     min_res_h: Optional[int] = None,
+    max_res_h: Optional[int] = None,
     min_fps: Optional[float] = None,
+    max_fps: Optional[float] = None,
+    min_lat_ms: Optional[int] = None,
+    max_lat_ms: Optional[int] = None,
     codec_in: Optional[List[str]] = None,
     top_k: int = 5,
     weights: Optional[Dict[str, float]] = None,
@@ -77,32 +103,108 @@ def filter_and_rank_tool(
     """Rank feeds by clarity with optional weights and filters."""
     req = FilterAndRankRequest(
         theater=theater,
+        theater_match=theater_match,
+        min_res_w=min_res_w,
+        max_res_w=max_res_w,
+        min_res_h=min_res_h,
+        max_res_h=max_res_h,
+        min_fps=min_fps,
+        max_fps=max_fps,
+        min_lat_ms=min_lat_ms,
+        max_lat_ms=max_lat_ms,
+        codec_in=codec_in,
+        top_k=top_k,
+        weights=weights,
+    )
+    return _dump(await afilter_and_rank_feeds(ctx, req))
+
+
+@mcp.tool()
+async def grouped_rank_tool(
+    by: Literal["THEATER", "CODEC", "MODL_TAG"] = "THEATER",
+    theater: Optional[str] = None,
+    theater_match: Literal["exact", "contains"] = "exact",
+    min_res_w: Optional[int] = None,
+    max_res_w: Optional[int] = None,
+    min_res_h: Optional[int] = None,
+    max_res_h: Optional[int] = None,
+    min_fps: Optional[float] = None,
+    max_fps: Optional[float] = None,
+    min_lat_ms: Optional[int] = None,
+    max_lat_ms: Optional[int] = None,
+    codec_in: Optional[List[str]] = None,
+    top_k: int = 5,
+    weights: Optional[Dict[str, float]] = None,
+) -> dict:
+    """Top feeds by clarity in each theater (or codec, or model tag) from one scoring pass."""
+    req = GroupedRankRequest(
+        by=by,
+        theater=theater,
+        theater_match=theater_match,
         min_res_w=min_res_w,
+        max_res_w=max_res_w,
         min_res_h=min_res_h,
+        max_res_h=max_res_h,
         min_fps=min_fps,
+        max_fps=max_fps,
+        min_lat_ms=min_lat_ms,
+        max_lat_ms=max_lat_ms,
         codec_in=codec_in,
         top_k=top_k,
         weights=weights,
     )
-    return _dump(filter_and_rank_feeds(ctx, req))
+    return _dump(await agrouped_rank_feeds(ctx, req))
+
+
+@mcp.tool()
+async def pareto_feeds_tool(
+    theater: Optional[str] = None,
+    theater_match: Literal["exact", "contains"] = "exact",
+    min_res_w: Optional[int] = None,
+    max_res_w: Optional[int] = None,
+    min_res_h: Optional[int] = None,
+    max_res_h: Optional[int] = None,
+    min_fps: Optional[float] = None,
+    max_fps: Optional[float] = None,
+    min_lat_ms: Optional[int] = None,
+    max_lat_ms: Optional[int] = None,
+    codec_in: Optional[List[str]] = None,
+    limit: int = 50,
+) -> dict:
+    """Feeds no other feed beats on resolution, fps, codec efficiency and latency at once, no weights needed."""
+    req = ParetoFeedsRequest(
+        theater=theater,
+        theater_match=theater_match,
+        min_res_w=min_res_w,
+        max_res_w=max_res_w,
+        min_res_h=min_res_h,
+        max_res_h=max_res_h,
+        min_fps=min_fps,
+        max_fps=max_fps,
+        min_lat_ms=min_lat_ms,
+        max_lat_ms=max_lat_ms,
+        codec_in=codec_in,
+        limit=limit,
+    )
+    return _dump(await apareto_feeds(ctx, req))
 
 
 @mcp.tool()
 def get_encoder_params_tool() -> dict:
     """Return encoder parameters."""
-    return _dump(get_encoder_params(ctx, GetEncoderParamsRequest()))
+    return ctx.static().dicts["encoder_params"]
 
 
 @mcp.tool()
 def get_decoder_params_tool() -> dict:
     """Return decoder parameters."""
-    return _dump(get_decoder_params(ctx, GetDecoderParamsRequest()))
+    return ctx.static().dicts["decoder_params"]
 
 
 @mcp.tool()
-def summarize_selection_tool(feed_ids: List[str]) -> dict:
+async def summarize_selection_tool(feed_ids: List[str]) -> dict:
     """Summarize a list of feed IDs."""
-    return _dump(summarize_selection(ctx, SummarizeSelectionRequest(feed_ids=feed_ids)))
+    return _dump(await asummarize_selection(ctx, SummarizeSelectionRequest(feed_ids=feed_ids)))
 
 
 @mcp.tool()
@@ -112,9 +214,53 @@ def explain_term_tool(phrase: str) -> dict:
 
 
 @mcp.tool()
-def sanity_check_constraints_tool(feed_ids: List[str]) -> dict:
-    """Check decoder constraints for a list of feed IDs."""
-    return _dump(sanity_check_constraints(ctx, SanityCheckRequest(feed_ids=feed_ids)))
+async def sanity_check_constraints_tool(feed_ids: Optional[List[str]] = None, theater: Optional[str] = None) -> dict:
+    """Check decoder constraints for feed IDs, a whole theater, or both. Issues come back per feed and grouped by rule."""
+    return _dump(await asanity_check_constraints(ctx, SanityCheckRequest(feed_ids=feed_ids, theater=theater)))
+
+
+@mcp.tool()
+async def decoder_compatibility_tool(
+    profile: Optional[str] = None,
+    theater: Optional[str] = None,
+    feed_ids: Optional[List[str]] = None,
+    limit: int = 50,
+) -> dict:
+    """Which feeds each decoder profile (thin_client, workstation, edge, ...) can play, e.g. profile="edge", theater="PAC"."""
+    req = DecoderCompatibilityRequest(profile=profile, theater=theater, feed_ids=feed_ids, limit=limit)
+    return _dump(await adecoder_compatibility(ctx, req))
+
+
+@mcp.tool()
+async def encoder_match_tool(theater: Optional[str] = None, codec: Optional[str] = None, limit: int = 50) -> dict:
+    """Feeds that would need transcoding under the encoder params, with estimated transcode bitrate per theater and codec."""
+    return _dump(await aencoder_match(ctx, EncoderMatchRequest(theater=theater, codec=codec, limit=limit)))
+
+
+@mcp.tool()
+async def upsert_feeds_tool(feeds: List[Dict[str, Any]]) -> dict:
+    """Insert or update feeds by FEED_ID. Fields left out of an update keep their value."""
+    return _dump(await aupsert_feeds(ctx, UpsertFeedsRequest(feeds=feeds)))
+
+
+@mcp.tool()
+async def delete_feeds_tool(feed_ids: List[str]) -> dict:
+    """Delete feeds by FEED_ID."""
+    return _dump(await adelete_feeds(ctx, DeleteFeedsRequest(feed_ids=feed_ids)))
+
+
+@mcp.tool()
+async def query_batch_tool(questions: List[str]) -> dict:
+    """Answer many questions at once (up to CANYON_MAX_BATCH), sharing filtering and scoring. Results keep input order."""
+    finals = await ctx.run(answer_batch, ctx, questions)
+    return {"results": [{"question": f["question"], "answer": f.get("answer", ""), "evidence": f.get("evidence")}
+                        for f in finals]}
+
+
+@mcp.tool()
+def cache_stats_tool() -> dict:
+    """Hit/miss counters and size of the tool result cache."""
+    return ctx.cache.stats()
 
 
 if __name__ == "__main__":
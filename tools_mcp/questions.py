@@ -0,0 +1,265 @@
+from __future__ import annotations
+from typing import TypedDict, Dict, Any, List
+import os, re
+from functools import lru_cache
+from .tools import (
+    ToolContext, list_feeds, filter_and_rank_feeds, get_encoder_params, get_decoder_params,
+    explain_term, sanity_check_constraints, batch_filter_and_rank, filters_key,
+)
+from .schemas import (
+    ListFeedsRequest, FilterAndRankRequest, GetEncoderParamsRequest, GetDecoderParamsRequest,
+    ExplainTermRequest, SanityCheckRequest,
+)
+
+# Plain-language questions over the tools: parse a question into an intent
+# and filters, call the tools for it, format the answer. The LangGraph app
+# (app.graph) and the batch endpoints both run questions through these.
+
+class AgentState(TypedDict, total=False):
+    question: str
+    intent: str
+    filters: Dict[str, Any]
+    result: Any
+    notes: List[str]
+    answer: str
+    weights: dict | None
+    evidence: dict | None
+
+THEATER_CODES = ["PAC","CONUS","EUR","ME","AFR","ARC"]
+
+# Question parsing: one precompiled pattern per filter family, each scanned
+# once. Theater and codec words cannot overlap, so findall over the combined
+# alternation sees every one of them and the priority below decides.
+_THEATER_RE = re.compile(r"\b(" + "|".join(THEATER_CODES) + r")\b", re.IGNORECASE)
+_FPS_RE = re.compile(r"(\d+(?:\.\d+)?)\s*fps", re.IGNORECASE)
+_RES_RE = re.compile(r"(\d{3,4})\s*[xX]\s*(\d{3,4})")
+_RES_P_RE = re.compile(r"(\d{3,4})p", re.IGNORECASE)
+_LAT_RE = re.compile(r"(?:under|below|less than|at most|<=?)\s*(\d+)\s*ms\b", re.IGNORECASE)
+_CODEC_RE = re.compile(r"\b(h265|hevc|h264|avc|av1)\b", re.IGNORECASE)
+# codec word -> codec_in, a later family overrides an earlier one (AV1 > H264 > H265)
+_CODEC_FAMILIES = [
+    ({"h265", "hevc"}, ("H265", "HEVC")),
+    ({"h264", "avc"}, ("H264", "AVC")),
+    ({"av1"}, ("AV1",)),
+]
+
+# intent -> keywords, first intent with a keyword in the lower-cased question wins
+_INTENT_KEYWORDS = [
+    ("get_encoder", ("encoder",)),
+    ("get_decoder", ("decoder",)),
+    ("sanity_check", ("check", "validate", "compatibility", "constraints")),
+    ("list_feeds", ("list feeds", "show feeds", "which cameras", "which feeds")),
+    ("rank_feeds", ("best clarity", "rank", "top", "best", "smooth", "latency")),
+]
+
+# operator questions repeat a lot, parsed results are memoized
+PARSE_CACHE_SIZE = 4096
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_filters(q: str) -> tuple:
+    f: Dict[str, Any] = {}
+    theaters = {t.upper() for t in _THEATER_RE.findall(q)}
+    for code in THEATER_CODES:
+        if code in theaters:
+            f["theater"] = code
+            break
+    m = _FPS_RE.search(q)
+    if m:
+        f["min_fps"] = float(m.group(1))
+    m = _RES_RE.search(q)
+    if m:
+        f["min_res_w"] = int(m.group(1)); f["min_res_h"] = int(m.group(2))
+    else:
+        m = _RES_P_RE.search(q)
+        if m:
+            f["min_res_h"] = int(m.group(1))
+            f["min_res_w"] = int(int(m.group(1)) * 16 / 9)
+    m = _LAT_RE.search(q)
+    if m:
+        f["max_lat_ms"] = int(m.group(1))
+    codecs = {c.lower() for c in _CODEC_RE.findall(q)}
+    for words, codec_in in _CODEC_FAMILIES:
+        if codecs & words:
+            f["codec_in"] = codec_in
+    return tuple(f.items())
+
+def parse_filters(q: str) -> Dict[str, Any]:
+    # fresh dict and lists per call, callers may mutate them
+    return {k: list(v) if isinstance(v, tuple) else v for k, v in _parse_filters(q)}
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def classify_intent(q: str) -> str:
+    q_low = q.lower()
+    for intent, keywords in _INTENT_KEYWORDS:
+        if any(k in q_low for k in keywords):
+            return intent
+    return "rank_feeds"
+
+def classify(state: AgentState) -> AgentState:
+    q = state["question"]
+    intent = classify_intent(q)
+    filters = parse_filters(q)
+    notes = [f"intent={intent}", f"filters={filters}"]
+    return {**state, "intent": intent, "filters": filters, "notes": notes}
+
+def question_weights(ctx: ToolContext, qtext: str) -> dict | None:
+    # ranking weights only when the question names a quality, else the defaults
+    if any(k in qtext.lower() for k in ["clarity", "smooth", "latency"]):
+        return explain_term(ctx, ExplainTermRequest(phrase=qtext)).weights
+    return None
+
+def call_tools(ctx: ToolContext, state: AgentState) -> AgentState:
+    intent = state["intent"]
+    filters = state.get("filters", {})
+    qtext = state.get("question", "")
+
+    # get_encoder
+    if intent == "get_encoder":
+        res = get_encoder_params(ctx, GetEncoderParamsRequest()).params
+        return {**state, "result": res}
+
+    # get_decoder
+    if intent == "get_decoder":
+        res = get_decoder_params(ctx, GetDecoderParamsRequest()).params
+        return {**state, "result": res}
+
+    # list_feeds
+    if intent == "list_feeds":
+        req = ListFeedsRequest(**filters, limit=10)
+        res = list_feeds(ctx, req).feeds
+        return {**state, "result": res}
+
+    # sanity_check
+    if intent == "sanity_check":
+        weights = question_weights(ctx, qtext)
+        req_rank = FilterAndRankRequest(**filters, top_k=5, weights=weights)
+        ranked = filter_and_rank_feeds(ctx, req_rank).feeds
+        ids = [r.FEED_ID for r in ranked]
+        issues = sanity_check_constraints(ctx, SanityCheckRequest(feed_ids=ids)).issues
+        return {**state, "result": {"ranked": ranked, "issues": issues}, "weights": weights}
+
+    # default: rank_feeds
+    weights = question_weights(ctx, qtext)
+    req = FilterAndRankRequest(**filters, top_k=5, weights=weights)
+    ranked = filter_and_rank_feeds(ctx, req).feeds
+    return {**state, "result": ranked, "weights": weights}
+
+def format_answer(state: AgentState) -> AgentState:
+    intent = state["intent"]
+    res = state.get("result")
+    filters = state.get("filters", {})
+    weights = state.get("weights")
+    lines: List[str] = []
+    evidence: dict | None = None
+
+    if intent in ["get_encoder", "get_decoder"]:
+        title = "Encoder" if intent == "get_encoder" else "Decoder"
+        lines.append(f"{title} parameters:")
+        for k, v in res.items():
+            lines.append(f"- {k}: {v}")
+        evidence = {"params_keys": list(res.keys())[:10]}
+
+    elif intent == "list_feeds":
+        header = f"Feeds matching {filters}:" if filters else "Feeds:"
+        lines.append(header)
+        ids: List[str] = []
+        for item in res:
+            ids.append(item.FEED_ID)
+            lines.append(
+                f"- {item.FEED_ID} | {item.THEATER} | {item.RES_W}x{item.RES_H} | {item.FRRATE} fps | {item.CODEC}"
+            )
+        evidence = {"filters": filters, "feed_ids": ids}
+
+    elif intent == "sanity_check":
+        ranked = res.get("ranked", [])
+        issues = res.get("issues", [])
+        header = f"Top feeds by clarity matching {filters}:" if filters else "Top feeds by clarity:"
+        lines.append(header)
+        ids: List[str] = []
+        scores: List[dict] = []
+        for item in ranked:
+            ids.append(item.FEED_ID)
+            scores.append({"feed_id": item.FEED_ID, "score": float(item.clarity_score)})
+            lines.append(
+                f"- {item.FEED_ID} | {item.THEATER} | {item.RES_W}x{item.RES_H} | {item.FRRATE} fps | {item.CODEC} | score {item.clarity_score:.3f}"
+            )
+        if issues:
+            lines.append("Constraints findings:")
+            for iss in issues:
+                lines.append(f"- [{iss.severity}] {iss.feed_id} - {iss.kind}: {iss.detail}")
+        else:
+            lines.append("No constraint issues found against current decoder caps.")
+        evidence = {
+            "filters": filters,
+            "weights": weights,
+            "feed_ids": ids,
+            "scores": scores,
+            "issues": [iss.model_dump() for iss in issues],
+        }
+
+    else:
+        # rank_feeds
+        header = f"Top feeds by clarity matching {filters}:" if filters else "Top feeds by clarity:"
+        lines.append(header)
+        ids: List[str] = []
+        scores: List[dict] = []
+        for item in res:
+            ids.append(item.FEED_ID)
+            scores.append({"feed_id": item.FEED_ID, "score": float(item.clarity_score)})
+            lines.append(
+                f"- {item.FEED_ID} | {item.THEATER} | {item.RES_W}x{item.RES_H} | {item.FRRATE} fps | {item.CODEC} | score {item.clarity_score:.3f}"
+            )
+        evidence = {"filters": filters, "weights": weights, "feed_ids": ids, "scores": scores}
+
+    return {**state, "answer": "\n".join(lines), "evidence": evidence}
+
+# a batch runs in one request slot, CANYON_MAX_BATCH bounds the questions in it
+MAX_BATCH_QUESTIONS = int(os.environ.get("CANYON_MAX_BATCH", "64"))
+
+def answer_batch(ctx: ToolContext, questions: List[str]) -> List[AgentState]:
+    """Answer many questions with shared work, final states in input order.
+
+    Same answers as invoking the graph once per question, but questions with
+    the same filters and weights share one selection and one score vector
+    (batch_filter_and_rank), identical listings and constraint checks run
+    once, and every question reads the same store. More than
+    MAX_BATCH_QUESTIONS questions is a ValueError.
+    """
+    if len(questions) > MAX_BATCH_QUESTIONS:
+        raise ValueError(f"at most {MAX_BATCH_QUESTIONS} questions per batch, got {len(questions)}")
+    pinned = ctx.pinned()
+    states = [classify({"question": q}) for q in questions]
+
+    rank_at: List[int] = []
+    rank_reqs: List[FilterAndRankRequest] = []
+    for i, st in enumerate(states):
+        if st["intent"] in ("rank_feeds", "sanity_check"):
+            st["weights"] = question_weights(pinned, st["question"])
+            rank_at.append(i)
+            rank_reqs.append(FilterAndRankRequest(**st["filters"], top_k=5, weights=st["weights"]))
+    ranked = dict(zip(rank_at, batch_filter_and_rank(pinned, rank_reqs)))
+
+    done: Dict[tuple, Any] = {}
+    def once(key: tuple, fn):
+        if key not in done:
+            done[key] = fn()
+        return done[key]
+
+    for i, st in enumerate(states):
+        intent = st["intent"]
+        if intent == "get_encoder":
+            st["result"] = once(("enc",), lambda: get_encoder_params(pinned, GetEncoderParamsRequest()).params)
+        elif intent == "get_decoder":
+            st["result"] = once(("dec",), lambda: get_decoder_params(pinned, GetDecoderParamsRequest()).params)
+        elif intent == "list_feeds":
+            req = ListFeedsRequest(**st["filters"], limit=10)
+            st["result"] = once(("list", filters_key(st["filters"])), lambda: list_feeds(pinned, req).feeds)
+        elif intent == "sanity_check":
+            feeds = ranked[i].feeds
+            ids = [r.FEED_ID for r in feeds]
+            issues = once(("check", tuple(ids)),
+                          lambda: sanity_check_constraints(pinned, SanityCheckRequest(feed_ids=ids)).issues)
+            st["result"] = {"ranked": feeds, "issues": issues}
+        else:
+            st["result"] = ranked[i].feeds
+    return [format_answer(st) for st in states]
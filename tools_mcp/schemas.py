@@ -13,12 +13,21 @@ class TableColumn(BaseModel):
 class GetTableSchemaResponse(BaseModel):
     columns: List[TableColumn]
 
-class ListFeedsRequest(BaseModel):
+class FeedFilter(BaseModel):
+    """Row filters shared by the feed list and rank requests."""
     theater: Optional[str] = None
+    theater_match: Literal["exact", "contains"] = "exact"
     min_res_w: Optional[int] = None
+    max_res_w: Optional[int] = None
     min_res_h: Optional[int] = None
+    max_res_h: Optional[int] = None
     min_fps: Optional[float] = None
+    max_fps: Optional[float] = None
+    min_lat_ms: Optional[int] = None
+    max_lat_ms: Optional[int] = None
     codec_in: Optional[List[str]] = None
+
+class ListFeedsRequest(FeedFilter):
     limit: Optional[int] = 50
 
 class FeedItem(BaseModel):
@@ -32,12 +41,7 @@ class FeedItem(BaseModel):
 class ListFeedsResponse(BaseModel):
     feeds: List[FeedItem]
 
-class FilterAndRankRequest(BaseModel):
-    theater: Optional[str] = None
-    min_res_w: Optional[int] = None
-    min_res_h: Optional[int] = None
-    min_fps: Optional[float] = None
-    codec_in: Optional[List[str]] = None
+class FilterAndRankRequest(FeedFilter):
     sort_by: Literal["clarity"] = "clarity"
     top_k: Optional[int] = 10
     weights: Optional[Dict[str, float]] = None
@@ -81,7 +85,9 @@ class ExplainTermResponse(BaseModel):
     notes: List[str] = []
 
 class SanityCheckRequest(BaseModel):
-    feed_ids: List[str]
+    # feed_ids and/or a whole theater, neither checks the whole table
+    feed_ids: Optional[List[str]] = None
+    theater: Optional[str] = None
 
 class ConstraintIssue(BaseModel):
     feed_id: str
@@ -89,5 +95,94 @@ class ConstraintIssue(BaseModel):
     detail: str
     severity: Literal["warn", "error"] = "warn"
 
+class IssueGroup(BaseModel):
+    kind: str
+    severity: Literal["warn", "error"]
+    count: int
+    feed_ids: List[str]
+
 class SanityCheckResponse(BaseModel):
+    # issues in table order, a feed's issues in rule order; groups one per rule that fired
     issues: List[ConstraintIssue]
+    groups: List[IssueGroup] = []
+
+class UpsertFeedsRequest(BaseModel):
+    # one dict per feed, FEED_ID required, other table columns optional
+    feeds: List[Dict[str, Any]]
+
+class UpsertFeedsResponse(BaseModel):
+    inserted: int
+    updated: int
+    rows: int
+    data_version: int
+
+class DeleteFeedsRequest(BaseModel):
+    feed_ids: List[str]
+
+class DeleteFeedsResponse(BaseModel):
+    deleted: int
+    rows: int
+    data_version: int
+
+class DecoderCompatibilityRequest(BaseModel):
+    # one profile, or every profile when None; selection by theater and/or feed_ids
+    profile: Optional[str] = None
+    theater: Optional[str] = None
+    feed_ids: Optional[List[str]] = None
+    limit: Optional[int] = 50
+
+class ProfileCompatibility(BaseModel):
+    profile: str
+    playable: int
+    total: int
+    feed_ids: List[str]  # playable feeds in table order, up to limit
+
+class DecoderCompatibilityResponse(BaseModel):
+    data_version: int
+    blocking: List[str]
+    profiles: List[ProfileCompatibility]
+
+class EncoderMatchRequest(BaseModel):
+    theater: Optional[str] = None
+    codec: Optional[str] = None
+    limit: Optional[int] = 50
+
+class TranscodeGroup(BaseModel):
+    theater: Optional[str] = None
+    codec: Optional[str] = None
+    feeds: int
+    transcode: int
+    codec_mismatch: int
+    fps_mismatch: int
+    mean_match: float
+    transcode_kbps: float
+
+class EncoderMatchResponse(BaseModel):
+    data_version: int
+    encoder: Dict[str, Any]
+    theaters: List[TranscodeGroup]
+    groups: List[TranscodeGroup]  # per THEATER and CODEC
+    transcode_feed_ids: List[str]  # feeds needing transcoding in table order, up to limit
+
+class ParetoFeedsRequest(FeedFilter):
+    limit: Optional[int] = 50
+
+class ParetoFeedItem(FeedItem):
+    LAT_MS: Optional[int] = None
+    codec_efficiency: float
+
+class ParetoFeedsResponse(BaseModel):
+    feeds: List[ParetoFeedItem]
+
+class GroupedRankRequest(FeedFilter):
+    by: Literal["THEATER", "CODEC", "MODL_TAG"] = "THEATER"
+    top_k: int = 5
+    weights: Optional[Dict[str, float]] = None
+
+class RankedGroup(BaseModel):
+    group: str
+    feeds: List[RankedFeedItem]
+
+class GroupedRankResponse(BaseModel):
+    by: str
+    groups: List[RankedGroup]
@@ -1,27 +1,146 @@
 from __future__ import annotations
 from typing import List,Dict, Any
 from .schemas import ExplainTermRequest, ExplainTermResponse
+import asyncio, copy, json, os, threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import pandas as pd
 import re
 from datastore.loader import DataStore
+from datastore.indexes import intersect
+from datastore.watcher import SourceWatcher
+from util.ranking import resolve_weights
+from util.cache import ResultCache
 from .schemas import (
-    GetTableSchemaRequest, GetTableSchemaResponse, TableColumn,
+    GetTableSchemaRequest, GetTableSchemaResponse, TableColumn, FeedFilter,
     ListFeedsRequest, ListFeedsResponse, FeedItem,
     FilterAndRankRequest, FilterAndRankResponse, RankedFeedItem,
     GetEncoderParamsRequest, GetDecoderParamsRequest, GetParamsResponse,
     SummarizeSelectionRequest, SummarizeSelectionResponse, SummaryRow
 )
-from .schemas import SanityCheckRequest, SanityCheckResponse, ConstraintIssue
+from .schemas import SanityCheckRequest, SanityCheckResponse, ConstraintIssue, IssueGroup
+from .schemas import UpsertFeedsRequest, UpsertFeedsResponse, DeleteFeedsRequest, DeleteFeedsResponse
+from .schemas import DecoderCompatibilityRequest, DecoderCompatibilityResponse, ProfileCompatibility
+from .schemas import EncoderMatchRequest, EncoderMatchResponse, TranscodeGroup
+from .schemas import ParetoFeedsRequest, ParetoFeedsResponse, ParetoFeedItem
+from .schemas import GroupedRankRequest, GroupedRankResponse, RankedGroup
 
 
 class ToolContext:
-    def __init__(self, data_dir: str = "."):
-        self.store = DataStore(data_dir)
-        self.store.load_all()
+    """Holds the current DataStore and the tool result cache.
+
+    Tools read ctx.store once per call, so a reload (which swaps the whole
+    store in one assignment) never changes data under a running query.
+    Cache keys carry the store's data_version, so a reload or edit makes
+    older entries unreachable.
+    """
+
+    def __init__(self, data_dir: str = ".", shared: bool | None = None, watch: bool | None = None,
+                 watch_interval: float = 2.0):
+        # CANYON_SHARED_TABLE=1 maps one read-only feed table across worker processes
+        if shared is None:
+            shared = os.environ.get("CANYON_SHARED_TABLE") == "1"
+        # CANYON_HOT_RELOAD=1 rebuilds the store in the background when source files change
+        if watch is None:
+            watch = os.environ.get("CANYON_HOT_RELOAD") == "1"
+        self.data_dir = data_dir
+        self.shared = shared
+        # CPU-bound tool work for async callers runs here, CANYON_TOOL_WORKERS sizes it
+        self._executor: ThreadPoolExecutor | None = None
+        self.tool_workers = int(os.environ.get("CANYON_TOOL_WORKERS") or 0) or min(32, (os.cpu_count() or 1) + 4)
+        # results of list/rank/check tools, keyed by canonical request + data_version.
+        # CANYON_CACHE_MB bounds it (0 turns it off), CANYON_CACHE_TTL_S ages entries out
+        self.cache = ResultCache(
+            max_bytes=int(float(os.environ.get("CANYON_CACHE_MB", "64")) * 2**20),
+            ttl_s=float(os.environ.get("CANYON_CACHE_TTL_S", "300")),
+        )
+        # serializes writers (reloads, upserts, deletes), readers never take it
+        self._write_lock = threading.Lock()
+        self._static: StaticResponses | None = None
+        self.watcher: SourceWatcher | None = None
+        store = DataStore(data_dir, shared=shared)
+        if watch:
+            # stamp the sources before loading so a change during the load is not missed
+            self.watcher = SourceWatcher(store.source_paths() + store.config_paths(), self.reload,
+                                         interval=watch_interval)
+        store.load_all()
+        self.store = store
+        if self.watcher is not None:
+            self.watcher.start()
+
+    def reload(self) -> None:
+        """Build a fresh store off to the side, then swap it in."""
+        store = DataStore(self.data_dir, shared=self.shared)
+        store.load_all()
+        with self._write_lock:
+            self.store = store
+
+    def update(self, fn):
+        """Apply fn to a copy of the store and swap the copy in, returns fn's result.
+
+        DataStore edits replace arrays rather than writing into them, so a
+        shallow copy is enough to keep running queries on the old state.
+        """
+        with self._write_lock:
+            store = copy.copy(self.store)
+            out = fn(store)
+            self.store = store
+        return out
+
+    def static(self) -> "StaticResponses":
+        """Parameter and schema responses for the current store, built once per data_version."""
+        store = self.store
+        static = self._static
+        if static is None or static.data_version != store.data_version:
+            # racing builders produce equal objects, last one wins
+            static = self._static = StaticResponses(store)
+        return static
+
+    def pinned(self) -> "ToolContext":
+        """A context fixed to the current store, for work that must see one version across calls."""
+        return copy.copy(self)
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._write_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(self.tool_workers, thread_name_prefix="canyon-tools")
+        return self._executor
+
+    async def run(self, fn, *args):
+        """Await fn(*args) on the tool executor, the event loop stays free meanwhile."""
+        return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    def close(self) -> None:
+        if self.watcher is not None:
+            self.watcher.stop()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+class StaticResponses:
+    """Responses that only change when the source files do: encoder and decoder
+    params and the table schema, as models, JSON-ready dicts and JSON bytes.
+
+    Shared by every caller of one data_version, treat them as read-only.
+    """
+
+    NAMES = ("encoder_params", "decoder_params", "table_schema")
+
+    def __init__(self, store: DataStore):
+        self.data_version = store.data_version
+        self.encoder_params = GetParamsResponse(params=store.get_encoder_params().model_dump())
+        self.decoder_params = GetParamsResponse(params=store.get_decoder_params().model_dump())
+        self.table_schema = _table_schema(store)
+        self.json: Dict[str, bytes] = {n: getattr(self, n).model_dump_json().encode() for n in self.NAMES}
+        self.dicts: Dict[str, Dict[str, Any]] = {n: json.loads(self.json[n]) for n in self.NAMES}
 
 def get_table_schema(ctx: ToolContext, req: GetTableSchemaRequest) -> GetTableSchemaResponse:
+    return ctx.static().table_schema
+
+def _table_schema(store: DataStore) -> GetTableSchemaResponse:
     cols = []
-    for _, row in ctx.store.table_defs.iterrows():
+    for _, row in store.table_defs.iterrows():
         cols.append(TableColumn(
             header=str(row.get("header")),
             type=str(row.get("type")),
@@ -30,92 +149,187 @@ def get_table_schema(ctx: ToolContext, req: GetTableSchemaRequest) -> GetTableSc
         ))
     return GetTableSchemaResponse(columns=cols)
 
+# filter fields of every request built on FeedFilter
+FILTER_FIELDS = tuple(FeedFilter.model_fields)
+
+def request_filters(req) -> Dict[str, Any]:
+    return {k: getattr(req, k) for k in FILTER_FIELDS}
+
+def filters_key(filters: Dict[str, Any]) -> tuple:
+    """Hashable canonical form of a filter dict: unset filters dropped, case and codec order ignored."""
+    f = {k: v for k, v in filters.items() if v is not None and v != []}
+    if f.get("theater_match", "exact") == "exact":
+        f.pop("theater_match", None)
+    if "theater" in f:
+        f["theater"] = str(f["theater"]).upper()
+    if "codec_in" in f:
+        f["codec_in"] = tuple(sorted({str(c).upper() for c in f["codec_in"]}))
+    for k, v in f.items():
+        if k.startswith(("min_", "max_")):
+            f[k] = float(v)
+    return tuple(sorted(f.items()))
+
+def weights_key(weights: Dict[str, float] | None, ndigits: int = 6) -> tuple:
+    return tuple(sorted((k, round(float(v), ndigits)) for k, v in resolve_weights(weights).items()))
+
+def rank_key(store: DataStore, req: FilterAndRankRequest) -> tuple:
+    return ("filter_and_rank", store.data_version, filters_key(request_filters(req)),
+            weights_key(req.weights), req.top_k)
+
 def list_feeds(ctx: ToolContext, req: ListFeedsRequest) -> ListFeedsResponse:
-    df = ctx.store.list_feeds(
-        theater=req.theater,
-        min_res_w=req.min_res_w,
-        min_res_h=req.min_res_h,
-        min_fps=req.min_fps,
-        codec_in=req.codec_in,
-    )
-    if req.limit is not None:
-        df = df.head(req.limit)
-    feeds = [
-        FeedItem(
-            FEED_ID=str(r.FEED_ID),
-            THEATER=r.THEATER if "THEATER" in df.columns else None,
-            RES_W=int(r.RES_W) if pd.notna(r.RES_W) else None,
-            RES_H=int(r.RES_H) if pd.notna(r.RES_H) else None,
-            FRRATE=float(r.FRRATE) if "FRRATE" in df.columns and pd.notna(r.FRRATE) else None,
-            CODEC=str(r.CODEC) if "CODEC" in df.columns else None,
-        )
-        for r in df.itertuples(index=False)
-    ]
-    return ListFeedsResponse(feeds=feeds)
+    store = ctx.store
+    key = ("list_feeds", store.data_version, filters_key(request_filters(req)), req.limit)
+    return ctx.cache.get_or_compute(key, lambda: _list_feeds(store, req))
+
+def _list_feeds(store: DataStore, req: ListFeedsRequest) -> ListFeedsResponse:
+    df = store.list_feeds(**request_filters(req), limit=req.limit)
+    return ListFeedsResponse(feeds=_bulk(FeedItem, _feed_columns(df)))
+
+# Bulk responses: row values are converted column-at-a-time and the row models
+# built without validation, the columns already have the declared types.
+def _optional(df: pd.DataFrame, name: str, cast) -> List[Any]:
+    """Column values through cast, None where missing or when the column is absent."""
+    if name not in df.columns:
+        return [None] * len(df)
+    s = df[name]
+    missing = s.isna().to_numpy()
+    values = s.to_numpy(dtype=float, na_value=0.0).astype(cast).tolist() if cast is not object else s.tolist()
+    if missing.any():
+        for i in np.flatnonzero(missing).tolist():
+            values[i] = None
+    return values
+
+def _feed_columns(df: pd.DataFrame) -> Dict[str, List[Any]]:
+    # same values as FeedItem(...) per row: FEED_ID and CODEC stringified, numbers None when missing
+    none = [None] * len(df)
+    return {
+        "FEED_ID": [str(v) for v in df["FEED_ID"].tolist()],
+        "THEATER": _optional(df, "THEATER", object),
+        "RES_W": _optional(df, "RES_W", np.int64),
+        "RES_H": _optional(df, "RES_H", np.int64),
+        "FRRATE": _optional(df, "FRRATE", np.float64),
+        "CODEC": [str(v) for v in df["CODEC"].tolist()] if "CODEC" in df.columns else none,
+    }
+
+def _bulk(model, cols: Dict[str, List[Any]]) -> list:
+    """One model per row of cols, skipping validation.
+
+    Sets the same instance state as model.model_construct, which is slower
+    per row than validating; cols must hold every field with its declared type.
+    """
+    names = list(cols)
+    fields_set = set(names)
+    new, setattr_ = model.__new__, object.__setattr__
+    out = []
+    for values in zip(*cols.values()):
+        m = new(model)
+        setattr_(m, "__dict__", dict(zip(names, values)))
+        setattr_(m, "__pydantic_fields_set__", fields_set)
+        setattr_(m, "__pydantic_extra__", None)
+        setattr_(m, "__pydantic_private__", None)
+        out.append(m)
+    return out
 
 def filter_and_rank_feeds(ctx: ToolContext, req: FilterAndRankRequest) -> FilterAndRankResponse:
-    if not hasattr(ctx.store, "ranking_weights"):
-        ctx.store.ranking_weights = None
-
-    old = ctx.store.ranking_weights
-    try:
-        # Temporarily apply custom weights for this request
-        if req.weights:
-            ctx.store.ranking_weights = req.weights
-
-        df = ctx.store.filter_and_rank_feeds(
-            theater=req.theater,
-            min_res_w=req.min_res_w,
-            min_res_h=req.min_res_h,
-            min_fps=req.min_fps,
-            codec_in=req.codec_in,
-        )
+    store = ctx.store
+    return ctx.cache.get_or_compute(rank_key(store, req), lambda: _filter_and_rank_feeds(store, req))
+
+def _filter_and_rank_feeds(store: DataStore, req: FilterAndRankRequest) -> FilterAndRankResponse:
+    # weights travel with the request, nothing on the shared store is touched
+    df = store.filter_and_rank_feeds(**request_filters(req), top_k=req.top_k, weights=req.weights)
+    return FilterAndRankResponse(feeds=_ranked_items(df))
+
+def _ranked_items(df: pd.DataFrame) -> List[RankedFeedItem]:
+    cols = _feed_columns(df)
+    cols["clarity_score"] = df["clarity_score"].to_numpy(dtype=float).tolist()
+    return _bulk(RankedFeedItem, cols)
 
-        if req.top_k is not None:
-            df = df.head(req.top_k)
-
-        feeds = [
-            RankedFeedItem(
-                FEED_ID=str(r.FEED_ID),
-                THEATER=r.THEATER if "THEATER" in df.columns else None,
-                RES_W=int(r.RES_W) if pd.notna(r.RES_W) else None,
-                RES_H=int(r.RES_H) if pd.notna(r.RES_H) else None,
-                FRRATE=float(r.FRRATE) if "FRRATE" in df.columns and pd.notna(r.FRRATE) else None,
-                CODEC=str(r.CODEC) if "CODEC" in df.columns else None,
-                clarity_score=float(r.clarity_score),
-            )
-            for r in df.itertuples(index=False)
-        ]
-
-        return FilterAndRankResponse(feeds=feeds)
-    finally:
-        # Always restore previous weights
-        ctx.store.ranking_weights = old
+def grouped_rank_feeds(ctx: ToolContext, req: GroupedRankRequest) -> GroupedRankResponse:
+    store = ctx.store
+    key = ("grouped_rank", store.data_version, req.by, filters_key(request_filters(req)),
+           weights_key(req.weights), req.top_k)
+    return ctx.cache.get_or_compute(key, lambda: _grouped_rank_feeds(store, req))
+
+def _grouped_rank_feeds(store: DataStore, req: GroupedRankRequest) -> GroupedRankResponse:
+    df = store.grouped_top_k(req.by, req.top_k, req.weights, **request_filters(req))
+    items = _ranked_items(df)
+    groups: List[RankedGroup] = []
+    for value, item in zip(df["group"].tolist(), items):
+        if not groups or groups[-1].group != value:
+            groups.append(RankedGroup(group=str(value), feeds=[]))
+        groups[-1].feeds.append(item)
+    return GroupedRankResponse(by=req.by, groups=groups)
+
+def pareto_feeds(ctx: ToolContext, req: ParetoFeedsRequest) -> ParetoFeedsResponse:
+    store = ctx.store
+    key = ("pareto_feeds", store.data_version, filters_key(request_filters(req)), req.limit)
+    return ctx.cache.get_or_compute(key, lambda: _pareto_feeds(store, req))
+
+def _pareto_feeds(store: DataStore, req: ParetoFeedsRequest) -> ParetoFeedsResponse:
+    df = store.pareto_feeds(**request_filters(req), limit=req.limit)
+    cols = _feed_columns(df)
+    cols["LAT_MS"] = _optional(df, "LAT_MS", np.int64)
+    cols["codec_efficiency"] = df["codec_efficiency"].to_numpy(dtype=float).tolist()
+    return ParetoFeedsResponse(feeds=_bulk(ParetoFeedItem, cols))
+
+def batch_filter_and_rank(ctx: ToolContext, reqs: List[FilterAndRankRequest]) -> List[FilterAndRankResponse]:
+    """filter_and_rank_feeds for many requests against one store.
+
+    Cached responses are used as is. For the rest, each distinct filter
+    set is selected once and each distinct (filters, weights) pair scored
+    once; identical requests share the ranked rows. Responses come back
+    in request order.
+    """
+    store = ctx.store
+    selected: Dict[tuple, np.ndarray] = {}
+    scored: Dict[tuple, np.ndarray] = {}
+    ranked: Dict[tuple, FilterAndRankResponse] = {}
+    out = []
+    for req in reqs:
+        key = rank_key(store, req)
+        if key not in ranked:
+            hit, res = ctx.cache.get(key)
+            if not hit:
+                filters = request_filters(req)
+                fkey, wkey = key[2], key[3]
+                if fkey not in selected:
+                    pos = store.select_positions(**filters)
+                    selected[fkey] = np.arange(len(store.columns)) if pos is None else pos
+                if (fkey, wkey) not in scored:
+                    scored[fkey, wkey] = store.score_positions(selected[fkey], req.weights)
+                df = store.rank_positions(selected[fkey], scored[fkey, wkey], req.top_k)
+                res = FilterAndRankResponse(feeds=_ranked_items(df))
+                ctx.cache.put(key, res)
+            ranked[key] = res
+        out.append(ranked[key])
+    return out
 
 def get_encoder_params(ctx: ToolContext, req: GetEncoderParamsRequest) -> GetParamsResponse:
-    return GetParamsResponse(params=ctx.store.get_encoder_params().model_dump())
+    return ctx.static().encoder_params
 
 def get_decoder_params(ctx: ToolContext, req: GetDecoderParamsRequest) -> GetParamsResponse:
-    return GetParamsResponse(params=ctx.store.get_decoder_params().model_dump())
+    return ctx.static().decoder_params
 
 def summarize_selection(ctx: ToolContext, req: SummarizeSelectionRequest) -> SummarizeSelectionResponse:
-    subset = ctx.store.feeds_df[ctx.store.feeds_df["FEED_ID"].astype(str).isin(req.feed_ids)].copy()
-    if "clarity_score" not in subset.columns:
-        subset["clarity_score"] = subset.apply(ctx.store.clarity_score, axis=1)
-    rows = [
-        SummaryRow(
-            FEED_ID=str(r.FEED_ID),
-            THEATER=r.THEATER if "THEATER" in subset.columns else None,
-            RES_W=int(r.RES_W) if pd.notna(r.RES_W) else None,
-            RES_H=int(r.RES_H) if pd.notna(r.RES_H) else None,
-            FRRATE=float(r.FRRATE) if "FRRATE" in subset.columns and pd.notna(r.FRRATE) else None,
-            CODEC=str(r.CODEC) if "CODEC" in subset.columns else None,
-            clarity_score=float(r.clarity_score) if pd.notna(r.clarity_score) else None,
-        )
-        for r in subset.itertuples(index=False)
-    ]
+    store = ctx.store
+    pos = store.indexes.positions_for_ids(req.feed_ids)
+    subset = store.take(pos)
+    scores = store.score_positions(pos)
+    cols = _feed_columns(subset)
+    cols["clarity_score"] = [None if np.isnan(v) else v for v in np.asarray(scores, dtype=float).tolist()]
+    rows = _bulk(SummaryRow, cols)
     return SummarizeSelectionResponse(rows=rows)
 
+def upsert_feeds(ctx: ToolContext, req: UpsertFeedsRequest) -> UpsertFeedsResponse:
+    res = ctx.update(lambda store: {**store.upsert_feeds(req.feeds), "rows": len(store.columns),
+                                    "data_version": store.data_version})
+    return UpsertFeedsResponse(**res)
+
+def delete_feeds(ctx: ToolContext, req: DeleteFeedsRequest) -> DeleteFeedsResponse:
+    res = ctx.update(lambda store: {"deleted": store.delete_feeds(req.feed_ids), "rows": len(store.columns),
+                                    "data_version": store.data_version})
+    return DeleteFeedsResponse(**res)
+
 def explain_term(ctx: ToolContext, req: ExplainTermRequest) -> ExplainTermResponse:
     p = req.phrase.lower()
     notes = []
@@ -136,44 +350,120 @@ def explain_term(ctx: ToolContext, req: ExplainTermRequest) -> ExplainTermRespon
 
 
 def sanity_check_constraints(ctx: ToolContext, req: SanityCheckRequest) -> SanityCheckResponse:
-    df = ctx.store.feeds_df.copy()
-    sub = df[df["FEED_ID"].astype(str).isin(req.feed_ids)]
-    dec = ctx.store.get_decoder_params().model_dump()
-    cap_w = dec.get("cap_max_res_w") or 10**9
-    cap_h = dec.get("cap_max_res_h") or 10**9
-
-    issues: List[ConstraintIssue] = []
-    for r in sub.itertuples(index=False):
-        fid = str(r.FEED_ID)
-
-        # resolution ceiling
-        if r.RES_W and r.RES_H and (r.RES_W > cap_w or r.RES_H > cap_h):
-            issues.append(ConstraintIssue(
-                feed_id=fid,
-                kind="resolution_cap",
-                detail=f"{r.RES_W}x{r.RES_H} exceeds decoder cap {cap_w}x{cap_h}",
-                severity="error",
-            ))
+    store = ctx.store
+    # issues come out in table order, so id order and repeats do not matter
+    ids = None if req.feed_ids is None else tuple(sorted(set(req.feed_ids)))
+    theater = str(req.theater).upper() if req.theater else None
+    key = ("sanity_check", store.data_version, ids, theater)
+    return ctx.cache.get_or_compute(key, lambda: _sanity_check_constraints(store, req))
 
-        # conservative codec allowlist
-        codec = str(getattr(r, "CODEC", "") or "").upper()
-        allowed = {"H265","HEVC","H264","AVC"}
-        if codec and codec not in allowed:
-            issues.append(ConstraintIssue(
-                feed_id=fid,
-                kind="codec_unknown",
-                detail=f"Codec {codec} not in allowlist {sorted(list(allowed))}. Verify support.",
-                severity="warn",
-            ))
+def _sanity_check_constraints(store: DataStore, req: SanityCheckRequest) -> SanityCheckResponse:
+    pos = None if req.feed_ids is None else store.indexes.positions_for_ids(req.feed_ids)
+    if req.theater:
+        pos = intersect(pos, store.indexes.theater.lookup(req.theater))
+    hits = store.check_constraints(pos)
 
-        # high fps warning
-        fps = float(getattr(r, "FRRATE", 0) or 0)
-        if fps > 60:
-            issues.append(ConstraintIssue(
-                feed_id=fid,
-                kind="fps_high",
-                detail=f"{fps} fps may require tighter jitter buffer or reorder settings.",
-                severity="warn",
+    groups = []
+    for h in hits:
+        if len(h.pos):
+            groups.append(IssueGroup(
+                kind=h.rule.kind, severity=h.rule.severity, count=len(h.pos),
+                feed_ids=store.columns.strings("FEED_ID", h.pos).tolist(),
             ))
 
-    return SanityCheckResponse(issues=issues)
\ No newline at end of file
+    # flatten to table order, rule order within a feed
+    at = np.concatenate([h.pos for h in hits] or [np.empty(0, dtype=np.intp)])
+    rule_no = np.concatenate([np.full(len(h.pos), k) for k, h in enumerate(hits)] or [np.empty(0, dtype=int)])
+    order = np.lexsort((rule_no, at)).tolist()
+    cols = {
+        "feed_id": store.columns.strings("FEED_ID", at).tolist(),
+        "kind": [h.rule.kind for h in hits for _ in h.details],
+        "detail": [d for h in hits for d in h.details],
+        "severity": [h.rule.severity for h in hits for _ in h.details],
+    }
+    cols = {k: [v[i] for i in order] for k, v in cols.items()}
+    return SanityCheckResponse(issues=_bulk(ConstraintIssue, cols), groups=groups)
+
+
+def decoder_compatibility(ctx: ToolContext, req: DecoderCompatibilityRequest) -> DecoderCompatibilityResponse:
+    """Which feeds of the selection each decoder profile can play, from the per-version matrix."""
+    store = ctx.store
+    m = store.compatibility()
+    if req.profile is not None and req.profile not in m.profiles:
+        raise ValueError(f"unknown decoder profile {req.profile!r}, expected one of {m.profiles}")
+    pos = None if req.feed_ids is None else store.indexes.positions_for_ids(req.feed_ids)
+    if req.theater:
+        pos = intersect(pos, store.indexes.theater.lookup(req.theater))
+    if pos is None:
+        pos = np.arange(len(store.columns))
+    out = []
+    for name in ([req.profile] if req.profile is not None else m.profiles):
+        ok = pos[m.playable(name, pos)]
+        out.append(ProfileCompatibility(
+            profile=name, playable=len(ok), total=len(pos),
+            feed_ids=store.columns.strings("FEED_ID", ok[:req.limit]).tolist(),
+        ))
+    return DecoderCompatibilityResponse(data_version=m.data_version, blocking=store.blocking_rules, profiles=out)
+
+
+def encoder_match(ctx: ToolContext, req: EncoderMatchRequest) -> EncoderMatchResponse:
+    """Which feeds need transcoding under the encoder params, with per THEATER / CODEC totals."""
+    store = ctx.store
+    m = store.encoder_match()
+    theater = str(req.theater).upper() if req.theater else None
+    codec = str(req.codec).upper() if req.codec else None
+
+    def keep(g: Dict[str, Any]) -> bool:
+        return ((theater is None or (g["theater"] or "").upper() == theater)
+                and (codec is None or "codec" not in g or (g["codec"] or "").upper() == codec))
+
+    pos = None
+    if theater:
+        pos = intersect(pos, store.indexes.theater.lookup(theater))
+    if codec:
+        pos = intersect(pos, store.indexes.codec.lookup(codec))
+    if pos is None:
+        pos = np.arange(len(store.columns))
+    ids = pos[m.needs_transcode(pos)][:req.limit]
+    return EncoderMatchResponse(
+        data_version=m.data_version,
+        encoder=m.encoder,
+        # per-theater totals only mean the whole theater when no codec narrows it
+        theaters=[TranscodeGroup(**g) for g in m.theaters if keep(g)] if not codec else [],
+        groups=[TranscodeGroup(**g) for g in m.groups if keep(g)],
+        transcode_feed_ids=store.columns.strings("FEED_ID", ids).tolist(),
+    )
+
+
+# Async variants for event-loop callers (FastAPI async routes, the MCP server).
+# Same results as the sync tools; scoring and row materialization run on ctx.executor.
+
+async def alist_feeds(ctx: ToolContext, req: ListFeedsRequest) -> ListFeedsResponse:
+    return await ctx.run(list_feeds, ctx, req)
+
+async def afilter_and_rank_feeds(ctx: ToolContext, req: FilterAndRankRequest) -> FilterAndRankResponse:
+    return await ctx.run(filter_and_rank_feeds, ctx, req)
+
+async def asummarize_selection(ctx: ToolContext, req: SummarizeSelectionRequest) -> SummarizeSelectionResponse:
+    return await ctx.run(summarize_selection, ctx, req)
+
+async def asanity_check_constraints(ctx: ToolContext, req: SanityCheckRequest) -> SanityCheckResponse:
+    return await ctx.run(sanity_check_constraints, ctx, req)
+
+async def adecoder_compatibility(ctx: ToolContext, req: DecoderCompatibilityRequest) -> DecoderCompatibilityResponse:
+    return await ctx.run(decoder_compatibility, ctx, req)
+
+async def aencoder_match(ctx: ToolContext, req: EncoderMatchRequest) -> EncoderMatchResponse:
+    return await ctx.run(encoder_match, ctx, req)
+
+async def apareto_feeds(ctx: ToolContext, req: ParetoFeedsRequest) -> ParetoFeedsResponse:
+    return await ctx.run(pareto_feeds, ctx, req)
+
+async def agrouped_rank_feeds(ctx: ToolContext, req: GroupedRankRequest) -> GroupedRankResponse:
+    return await ctx.run(grouped_rank_feeds, ctx, req)
+
+async def aupsert_feeds(ctx: ToolContext, req: UpsertFeedsRequest) -> UpsertFeedsResponse:
+    return await ctx.run(upsert_feeds, ctx, req)
+
+async def adelete_feeds(ctx: ToolContext, req: DeleteFeedsRequest) -> DeleteFeedsResponse:
+    return await ctx.run(delete_feeds, ctx, req)
@@ -0,0 +1,108 @@
+from __future__ import annotations
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Tuple
+import sys, threading, time
+
+
+def approx_size(value: Any) -> int:
+    """Rough in-memory size of a cached response, used as its cache weight.
+
+    Lists are weighed by their first element times their length, so a
+    response of any row count is weighed in time proportional to its depth,
+    not its rows. Values shared between rows (category strings, small
+    ints) are counted per row, so it errs high, about 2x for feed lists.
+    """
+    if isinstance(value, (list, tuple)):
+        size = sys.getsizeof(value)
+        return size + len(value) * approx_size(value[0]) if value else size
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(approx_size(k) + approx_size(v) for k, v in value.items())
+    fields = getattr(value, "__dict__", None)
+    if fields is not None:
+        # pydantic models and plain objects: the instance, its dict and the field values
+        return sys.getsizeof(value) + approx_size(fields)
+    return sys.getsizeof(value)
+
+
+class ResultCache:
+    """Thread-safe LRU cache with a TTL and a byte budget.
+
+    Entries are weighed once, on insert, with sizeof. The least recently
+    used entries are evicted until the total fits max_bytes; a value larger
+    than the whole budget is returned but not stored. max_bytes=0 disables
+    caching. Cached values are shared between callers and must not be
+    mutated.
+    """
+
+    def __init__(self, max_bytes: int, ttl_s: float, sizeof: Callable[[Any], int] = approx_size):
+        self.max_bytes = max_bytes
+        self.ttl_s = ttl_s
+        self.sizeof = sizeof
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[2] > self.ttl_s:
+                self._drop(key)
+                self.expired += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[0]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.max_bytes <= 0:
+            return
+        size = self.sizeof(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (value, size, time.monotonic())
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        # compute runs outside the lock, two misses on one key may both compute
+        hit, value = self.get(key)
+        if hit:
+            return value
+        value = compute()
+        self.put(key, value)
+        return value
+
+    def _drop(self, key: Hashable) -> None:
+        _, size, _ = self._entries.pop(key)
+        self.bytes -= size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "evictions": self.evictions,
+            "expired": self.expired,
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "ttl_s": self.ttl_s,
+        }
@@ -1,39 +1,157 @@
 from __future__ import annotations
-from typing import Dict
+from typing import Dict, Tuple
+import numpy as np
 import pandas as pd
 
 DEFAULT_WEIGHTS = {"resolution": 0.5, "fps": 0.3, "codec": 0.2}
 
-def clarity_score_from_row(row, df: pd.DataFrame, weights: Dict[str, float] | None = None) -> float:
-    wts = {**DEFAULT_WEIGHTS, **(weights or {})}
-    # resolution part
-    w = float(row.get("RES_W") or 0)
-    h = float(row.get("RES_H") or 0)
-    area = w * h
-    max_area = (df["RES_W"].fillna(0) * df["RES_H"].fillna(0)).max()
-    max_area = float(max_area) if pd.notna(max_area) and max_area > 0 else 1.0
-    res_score = area / max_area
-
-    # fps part
-    fr = float(row.get("FRRATE") or 0)
-    if "FRRATE" in df.columns:
-        max_fps = pd.to_numeric(df["FRRATE"], errors="coerce").fillna(0).max()
-        max_fps = float(max_fps) if max_fps and max_fps > 0 else 1.0
-    else:
-        max_fps = 1.0
-    fps_score = fr / max_fps
-
-    # codec part
-    codec = str(row.get("CODEC") or "").upper()
-    if codec in ["H265", "HEVC", "AV1"]:
-        codec_bonus = 1.0
-    elif codec in ["H264", "AVC", "VP9"]:
-        codec_bonus = 0.9
-    else:
-        codec_bonus = 0.7
-
-    return (
-        wts["resolution"] * res_score
-        + wts["fps"] * fps_score
-        + wts["codec"] * codec_bonus
-    )
+# codec bonus tiers, anything not listed gets CODEC_BONUS_DEFAULT
+CODEC_BONUS = {
+    "H265": 1.0, "HEVC": 1.0, "AV1": 1.0,
+    "H264": 0.9, "AVC": 0.9, "VP9": 0.9,
+}
+CODEC_BONUS_DEFAULT = 0.7
+
+
+def resolve_weights(weights: Dict[str, float] | None = None) -> Dict[str, float]:
+    return {**DEFAULT_WEIGHTS, **(weights or {})}
+
+
+def codec_bonus(codecs) -> np.ndarray:
+    codecs = pd.Series(codecs).fillna("").astype(str).str.upper()
+    return codecs.map(CODEC_BONUS).fillna(CODEC_BONUS_DEFAULT).to_numpy(dtype=float)
+
+
+def components_from_arrays(res_w: np.ndarray, res_h: np.ndarray, fps: np.ndarray, codec: np.ndarray,
+                           max_area: float, max_fps: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Normalized resolution, fps and codec components from raw column arrays (missing numbers already 0).
+
+    max_area and max_fps are the table-wide maxima (FeedStats.norms), so a
+    selection scores the same as it would inside the full table.
+    """
+    return res_w * res_h / max_area, fps / max_fps, codec
+
+
+def combine_components(components: Tuple[np.ndarray, np.ndarray, np.ndarray],
+                       weights: Dict[str, float] | None = None) -> np.ndarray:
+    """Weighted sum of precomputed components."""
+    wts = resolve_weights(weights)
+    res, fps, codec = components
+    out = np.multiply(res, wts["resolution"])
+    out += wts["fps"] * fps
+    out += wts["codec"] * codec
+    return out
+
+
+def top_k_order(scores: np.ndarray, ids: np.ndarray, k: int | None = None) -> np.ndarray:
+    """Positions of the k highest scores, best first, ties broken by ascending id.
+
+    Uses argpartition so only the k winners (plus anything tied with the
+    k-th score) get sorted. k=None sorts everything. NaN scores rank last.
+    """
+    scores = np.nan_to_num(np.asarray(scores, dtype=float), nan=-np.inf)
+    ids = np.asarray(ids)
+    n = len(scores)
+    if k is None or k >= n:
+        return np.lexsort((ids, -scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    kth = -np.partition(-scores, k - 1)[k - 1]
+    # everything strictly better than the k-th score, plus all ties with it
+    cand = np.flatnonzero(scores >= kth)
+    order = np.lexsort((ids[cand], -scores[cand]))
+    return cand[order[:k]]
+
+
+# skyline_mask: sets this small are compared all pairs at once
+SKYLINE_LEAF = 64
+
+
+def skyline_mask(values: np.ndarray) -> np.ndarray:
+    """True for the rows of values (n x d, higher is better in every column) no other row dominates.
+
+    A row is dominated by one that is >= in every column and > in at least
+    one; equal rows do not dominate each other. Columns are replaced by
+    their dense ranks and equal rows are decided once. Divide and conquer
+    on the first column (Kung, Luccio and Preparata): the skyline of the
+    upper half, plus the rows of the lower half it does not dominate on the
+    remaining columns, which recurses one column down to a 2D staircase.
+    O(n log^(d-2) n) for d >= 3, O(n log n) for d <= 2.
+    """
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    if n == 0:
+        return np.zeros(0, dtype=bool)
+    values = values.reshape(n, -1)
+    ranks = np.empty(values.shape, dtype=np.int64)
+    for j in range(values.shape[1]):
+        _, ranks[:, j] = np.unique(values[:, j], return_inverse=True)
+    # distinct rows, inv maps each input row to its distinct row
+    order = np.lexsort(ranks.T[::-1])
+    ranks = ranks[order]
+    new = np.r_[True, (ranks[1:] != ranks[:-1]).any(axis=1)]
+    inv = np.empty(n, dtype=np.intp)
+    inv[order] = np.cumsum(new) - 1
+    rows = ranks[new]
+    on = np.zeros(len(rows), dtype=bool)
+    on[_skyline(rows)] = True
+    return on[inv]
+
+
+def _skyline(pts: np.ndarray) -> np.ndarray:
+    # indices of the skyline of distinct rows
+    n, d = pts.shape
+    if d == 1:
+        return np.flatnonzero(pts[:, 0] == pts[:, 0].max())
+    if n <= SKYLINE_LEAF:
+        # distinct rows, so >= everywhere and not itself is dominance
+        ge = (pts[None, :, :] >= pts[:, None, :]).all(axis=2)
+        np.fill_diagonal(ge, False)
+        return np.flatnonzero(~ge.any(axis=1))
+    col = pts[:, 0]
+    m = np.median(col)
+    hi = col > m
+    if not hi.any():
+        hi = col >= m
+        if hi.all():
+            # one value left in this column, it decides nothing
+            return _skyline(pts[:, 1:])
+    h, lo = np.flatnonzero(hi), np.flatnonzero(~hi)
+    h = h[_skyline(pts[h])]
+    # the upper half is strictly better on the first column, so >= on the
+    # rest is enough; rows it beats are dropped before recursing on them
+    lo = lo[~_weakly_dominated(pts[lo, 1:], pts[h, 1:])]
+    return np.concatenate([h, lo[_skyline(pts[lo])]])
+
+
+def _weakly_dominated(t: np.ndarray, s: np.ndarray) -> np.ndarray:
+    # bool per row of t: some row of s is >= in every column
+    nt, d = t.shape
+    if not nt or not len(s):
+        return np.zeros(nt, dtype=bool)
+    if d == 1:
+        return t[:, 0] <= s[:, 0].max()
+    if d == 2:
+        # staircase: s by first column descending, best second column so far
+        o = np.argsort(-s[:, 0], kind="stable")
+        stair_a, stair_b = s[o, 0], np.maximum.accumulate(s[o, 1])
+        cnt = np.searchsorted(-stair_a, -t[:, 0], side="right")
+        out = cnt > 0
+        out[out] = stair_b[cnt[out] - 1] >= t[out, 1]
+        return out
+    if nt * len(s) <= SKYLINE_LEAF * SKYLINE_LEAF:
+        return (s[None, :, :] >= t[:, None, :]).all(axis=2).any(axis=1)
+    m = np.median(np.concatenate([t[:, 0], s[:, 0]]))
+    t_hi, s_hi = t[:, 0] > m, s[:, 0] > m
+    if not (t_hi.any() or s_hi.any()):
+        t_hi, s_hi = t[:, 0] >= m, s[:, 0] >= m
+        if t_hi.all() and s_hi.all():
+            return _weakly_dominated(t[:, 1:], s[:, 1:])
+    out = np.zeros(nt, dtype=bool)
+    hi, lo = np.flatnonzero(t_hi), np.flatnonzero(~t_hi)
+    out[hi] = _weakly_dominated(t[hi], s[s_hi])
+    # the upper s beats the lower t on the first column, drop it there
+    out[lo] = _weakly_dominated(t[lo, 1:], s[s_hi, 1:])
+    rest = lo[~out[lo]]
+    out[rest] = _weakly_dominated(t[rest], s[~s_hi])
+    return out